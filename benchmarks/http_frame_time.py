@@ -0,0 +1,86 @@
+"""Measure frame times of ``HTTPTextDisplay`` against a deliberately slow
+local HTTP server, comparing the background fetcher with the original
+synchronous ``requests.get`` inside ``render``.
+
+Run with ``python benchmarks/http_frame_time.py``.
+"""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import statistics
+import threading
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pygame
+import requests
+
+from rendash.fetch import current_fetcher
+from rendash.plugins.http import HTTPTextDisplay
+
+
+DELAY = 0.5
+FRAMES = 120
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(DELAY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.end_headers()
+        self.wfile.write(b"hello from a slow server")
+
+    def log_message(self, *args):
+        pass
+
+
+class SynchronousHTTPTextDisplay(HTTPTextDisplay):
+    # the original behaviour: fetch inside the frame, with no timeout
+    def cache_update(self):
+        if time.time() >= self.cache_last + self.cache_timeout:
+            self.cache_last = time.time()
+            self.text = self.http_parser(requests.get(self.http_url))
+
+
+def measure(widget, surface, clock) -> list:
+    widget.before_start()
+
+    frame_times = []
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        widget.render_dirty(surface, clock)
+        frame_times.append(time.perf_counter() - start)
+        time.sleep(1 / 60)
+
+    return frame_times
+
+
+def report(name: str, frame_times: list):
+    frame_times = sorted(frame_times)
+    p95 = frame_times[int(len(frame_times) * 0.95) - 1]
+    print(f"{name}: mean {statistics.mean(frame_times) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms, max {frame_times[-1] * 1000:.2f} ms")
+
+
+def main():
+    server = HTTPServer(('127.0.0.1', 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+
+    pygame.init()
+    surface = pygame.Surface((400, 100))
+    clock = pygame.time.Clock()
+
+    # refetch every second, so a few fetches land inside the run
+    parser = lambda response: response.text
+    report("synchronous", measure(SynchronousHTTPTextDisplay(url, parser, cache_timeout=1), surface, clock))
+    report("background", measure(HTTPTextDisplay(url, parser, cache_timeout=1), surface, clock))
+
+    current_fetcher.shutdown()
+    server.shutdown()
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
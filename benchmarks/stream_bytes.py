@@ -0,0 +1,120 @@
+"""Measure the bytes sent per frame when streaming a typical dashboard (two
+clocks, one with seconds, and a row of sensor readings that change every
+second) from ``rendash.serve.FrameServer`` to a client over a loopback Unix
+socket, against sending every frame uncompressed.
+
+Run with ``python benchmarks/stream_bytes.py``.
+"""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import pygame
+
+from rendash.main import render_frame
+from rendash.serve import FrameServer, StreamRenderState
+from rendash.stream import FRAME, HELLO, HELLO_SIZE, MessageReader, decode_frame
+from rendash.plugins.basics import TextDisplay
+from rendash.plugins.clock import ClockDisplay
+from rendash.plugins.splits import HorizontalSplit, VerticalSplit
+
+
+SIZE = (1280, 720)
+FRAMES = 120
+FRAME_INTERVAL = 1 / 20
+UPDATE_EVERY = 20
+
+
+def dashboard():
+    readings = [TextDisplay(f"{name}: --") for name in ("Temperature", "Humidity", "Power")]
+    root = VerticalSplit([
+        (2, HorizontalSplit([
+            ClockDisplay("Local", "UTC", seconds=True),
+            ClockDisplay("Tokyo", "Asia/Tokyo"),
+        ])),
+        HorizontalSplit(readings),
+    ])
+
+    return (root, readings)
+
+
+def receive(address: str, results: dict):
+    # a client that decodes frames, but doesn't display them
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(address)
+    reader = MessageReader()
+    surface = None
+    decode_times = []
+
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            break
+
+        for (kind, payload) in reader.feed(data):
+            if kind == HELLO:
+                surface = pygame.Surface(HELLO_SIZE.unpack(payload))
+            elif kind == FRAME:
+                start = time.perf_counter()
+                decode_frame(surface, payload)
+                decode_times.append(time.perf_counter() - start)
+
+    results['decode_times'] = decode_times
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(SIZE, 0, 32)
+    clock = pygame.time.Clock()
+
+    (root, readings) = dashboard()
+    root.start()
+
+    path = os.path.join(tempfile.mkdtemp(), "stream.sock")
+    server = FrameServer(f"unix:{path}", SIZE)
+    server.start()
+    state = StreamRenderState(server, root)
+
+    results = {}
+    client = threading.Thread(target=receive, args=(path, results))
+    client.start()
+    while len(server.clients) == 0:
+        time.sleep(0.01)
+
+    frame_bytes = []
+    for frame in range(FRAMES):
+        # stand in for MQTT updates
+        if frame % UPDATE_EVERY == 0:
+            for (i, reading) in enumerate(readings):
+                reading.text = f"{reading.text.split(':')[0]}: {frame // UPDATE_EVERY * (i + 1)}"
+
+        sent = server.bytes_sent
+        render_frame(screen, clock, state)
+        frame_bytes.append(server.bytes_sent - sent)
+        time.sleep(FRAME_INTERVAL)
+
+    server.stop()
+    client.join()
+    root.stop()
+
+    raw = SIZE[0] * SIZE[1] * 3
+    first = frame_bytes[0]
+    rest = frame_bytes[1:]
+    print(f"screen {SIZE[0]}x{SIZE[1]}, {FRAMES} frames at {1 / FRAME_INTERVAL:.0f} fps")
+    print(f"uncompressed: {raw} bytes per frame")
+    print(f"first (full) frame: {first} bytes")
+    print(f"later frames: mean {statistics.mean(rest):.0f} bytes, max {max(rest)} bytes, {sum(1 for x in rest if x == 0)} frames sent nothing")
+    print(f"total: {sum(frame_bytes)} bytes, {sum(frame_bytes) / (raw * FRAMES) * 100:.3f}% of uncompressed")
+    print(f"client decode: mean {statistics.mean(results['decode_times']) * 1000:.2f} ms per frame sent")
+
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
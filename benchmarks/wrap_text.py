@@ -0,0 +1,69 @@
+"""Compare ``rendash.utils.text.wrap_text`` against the original
+character-at-a-time implementation, on ~10 KB strings.
+
+Run with ``python benchmarks/wrap_text.py``.
+"""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import random
+import timeit
+
+import pygame
+
+from rendash.utils.text import wrap_text, wrap_cache
+
+
+def legacy_wrap_text(text, font, width):
+    # the implementation wrap_text replaced, kept here for comparison
+    lines = []
+
+    while len(text) > 0:
+        idx = 0
+
+        while font.size(text[:idx])[0] < width and idx < len(text):
+            idx += 1
+
+        if idx < len(text):
+            idx = text.rfind(" ", 0, idx) + 1
+
+        lines.append(text[:idx])
+        text = text[idx:]
+
+    return lines
+
+
+def sample_text(length: int) -> str:
+    words = []
+    while sum(map(len, words)) + len(words) < length:
+        words.append("".join(random.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(random.randint(1, 12))))
+
+    return " ".join(words)[:length]
+
+
+def main():
+    pygame.font.init()
+    font = pygame.font.Font(None, 16)
+    random.seed(0)
+
+    for width in (200, 800):
+        text = sample_text(10 * 1024)
+
+        if wrap_text(text, font, width) != legacy_wrap_text(text, font, width):
+            print(f"width={width}: output differs from the original implementation")
+
+        legacy = min(timeit.repeat(lambda: legacy_wrap_text(text, font, width), number=1, repeat=3))
+
+        def uncached():
+            wrap_cache.clear()
+            wrap_text(text, font, width)
+
+        fresh = min(timeit.repeat(uncached, number=1, repeat=3))
+        cached = min(timeit.repeat(lambda: wrap_text(text, font, width), number=100, repeat=3)) / 100
+
+        print(f"width={width}: original {legacy * 1000:.2f} ms, new {fresh * 1000:.2f} ms, memoized {cached * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
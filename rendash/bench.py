@@ -0,0 +1,241 @@
+from rendash import __version__
+from rendash.config import current_config
+from rendash.fetch import current_fetcher
+from rendash.main import RenderState, render_frame
+from rendash.utils.surfaces import surface_pool
+from rendash.utils.text import text_cache
+
+from pathlib import Path
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+
+import pygame
+import requests
+from requests.adapters import BaseAdapter
+
+
+class SyntheticMessage:
+    def __init__(self, topic: str, payload: bytes):
+        """Stands in for a paho ``MQTTMessage``."""
+
+        self.topic = topic
+        self.payload = payload
+        self.qos = 0
+        self.retain = False
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} topic={repr(self.topic)} payload={repr(self.payload)}>"
+
+
+class StandInAdapter(BaseAdapter):
+    def __init__(self, responses: dict, default: bytes = b"{}"):
+        """A ``requests`` transport adapter that answers every request
+        locally, with the body given for its URL in `responses`, or
+        `default`."""
+
+        super(StandInAdapter, self).__init__()
+        self.responses = responses
+        self.default = default
+        self.requests = 0
+
+    def send(self, request, **kwargs):
+        self.requests += 1
+
+        body = self.responses.get(request.url, self.default)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/json' if body[:1] in (b"{", b"[") else 'text/plain'
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response._content = body
+        return response
+
+    def close(self):
+        pass
+
+
+def synthetic_topic(topic_filter: str) -> str:
+    """Returns a topic that matches `topic_filter`."""
+
+    return "/".join("bench" if level in ('+', '#') else level for level in topic_filter.split('/'))
+
+
+def percentile(values: list, pct: float) -> float:
+    """Returns the `pct` percentile of the sorted `values`, using the nearest
+    rank method."""
+
+    if len(values) == 0:
+        return 0
+
+    rank = max(int(round((pct / 100) * len(values))) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def peak_rss() -> int:
+    """Returns the peak resident set size of this process, in bytes."""
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS, and kilobytes everywhere else
+    if sys.platform == 'darwin':
+        return maxrss
+
+    return maxrss * 1024
+
+
+def run_benchmark(
+    frames: int = None,
+    seconds: float = None,
+    size: tuple = (1280, 720),
+    mqtt_every: int = 1,
+    full_redraw: bool = False,
+) -> dict:
+    """Render the configured root object headlessly, for `frames` frames or
+    `seconds` seconds (whichever comes first; 600 frames if neither is
+    given), and return the results.
+
+    Every `mqtt_every` frames, a synthetic message is delivered to every
+    subscribed MQTT topic. Payloads are taken in turn from the
+    ``BENCH_MQTT`` config value (a dict of topic to list of payloads), or
+    are an incrementing counter. HTTP requests are answered locally from the
+    ``BENCH_HTTP`` config value (a dict of URL to response body).
+
+    If `full_redraw` is True, the whole screen is redrawn every frame rather
+    than only the dirty areas.
+    """
+
+    if frames is None and seconds is None:
+        frames = 600
+
+    # answer HTTP requests locally
+    adapter = StandInAdapter(current_config.raw_values.get('BENCH_HTTP', {}))
+    current_fetcher.session.mount('http://', adapter)
+    current_fetcher.session.mount('https://', adapter)
+
+    screen = pygame.display.set_mode(size, 0, 32)
+    clock = pygame.time.Clock()
+    state = RenderState()
+
+    root_object = current_config.root_object()
+    root_object.start()
+
+    bench_mqtt = current_config.raw_values.get('BENCH_MQTT', {})
+    router = current_config.mqtt_router
+
+    frame_times = []
+    started = time.perf_counter()
+    deadline = None if seconds is None else started + seconds
+
+    frame = 0
+    while (frames is None or frame < frames) and (deadline is None or time.perf_counter() < deadline):
+        frame_started = time.perf_counter()
+
+        # feed every subscribed topic
+        if mqtt_every > 0 and frame % mqtt_every == 0:
+            for topic_filter in list(router.subscriptions.keys()):
+                payloads = bench_mqtt.get(topic_filter)
+                if payloads:
+                    payload = payloads[(frame // mqtt_every) % len(payloads)]
+                else:
+                    payload = str(frame // mqtt_every)
+
+                if isinstance(payload, str):
+                    payload = payload.encode('utf-8')
+
+                router.mailbox.put(None, None, SyntheticMessage(synthetic_topic(topic_filter), payload))
+
+        if full_redraw:
+            state.request_redraw()
+
+        render_frame(screen, clock, state)
+        pygame.event.pump()
+        clock.tick()
+
+        frame_times.append(time.perf_counter() - frame_started)
+        frame += 1
+
+    elapsed = time.perf_counter() - started
+    root_object.stop()
+
+    frame_times.sort()
+    mqtt_stats = router.mailbox.stats.values()
+
+    return {
+        'rendash_version': __version__,
+        'size': list(size),
+        'full_redraw': full_redraw,
+        'frames': frame,
+        'seconds': elapsed,
+        'fps': frame / elapsed if elapsed > 0 else 0,
+        'frame_time_ms': {
+            'p50': percentile(frame_times, 50) * 1000,
+            'p95': percentile(frame_times, 95) * 1000,
+            'p99': percentile(frame_times, 99) * 1000,
+            'max': (frame_times[-1] if frame_times else 0) * 1000,
+            'mean': (sum(frame_times) / len(frame_times) if frame_times else 0) * 1000,
+        },
+        'peak_rss_bytes': peak_rss(),
+        'mqtt': {
+            'topics': len(router.mailbox.stats),
+            'received': sum(stats.received for stats in mqtt_stats),
+            'coalesced': sum(stats.coalesced for stats in mqtt_stats),
+            'applied': sum(stats.applied for stats in mqtt_stats),
+        },
+        'http_requests': adapter.requests,
+        'text_cache': text_cache.stats(),
+        'surface_pool': surface_pool.stats(),
+    }
+
+
+def bench_argument_parser():
+    parser = argparse.ArgumentParser(prog="rendash bench", description="Benchmark rendering a dashboard, without a display.")
+    parser.add_argument('config', metavar='CONFIG', help='path to configuration file')
+    parser.add_argument('--frames', type=int, default=None, help='number of frames to render (default: 600, unless --seconds is given)')
+    parser.add_argument('--seconds', type=float, default=None, help='number of seconds to render for')
+    parser.add_argument('--size', default='1280x720', help='screen size, as WIDTHxHEIGHT (default: %(default)s)')
+    parser.add_argument('--mqtt-every', type=int, default=1, metavar='N', help='send synthetic MQTT messages every N frames, 0 to disable (default: %(default)s)')
+    parser.add_argument('--full-redraw', action='store_true', help='redraw the whole screen every frame')
+    parser.add_argument('--output', '-o', default=None, help='write the JSON results here, rather than to stdout')
+    return parser
+
+
+def bench_main(argv: list) -> int:
+    from rendash.cli import load_config
+
+    parser = bench_argument_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        size = tuple(int(x) for x in args.size.lower().split('x', 1))
+    except ValueError:
+        parser.error(f"invalid --size {repr(args.size)}")
+
+    # render without a screen
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    pygame.init()
+
+    load_config(Path(args.config))
+    results = run_benchmark(args.frames, args.seconds, size, args.mqtt_every, args.full_redraw)
+    results['config'] = str(args.config)
+
+    current_fetcher.shutdown()
+    pygame.quit()
+
+    output = json.dumps(results, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as fh:
+            fh.write(output + "\n")
+
+    return 0
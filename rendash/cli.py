@@ -1,49 +1,153 @@
 from rendash import __version__
-from rendash.main import main_loop
-from rendash.config import current_config
 
 from pathlib import Path
 
+import sys
 import argparse
-import pygame
+
+
+# Everything else is imported when it's needed, so that `--startup-profile`
+# can time it, and so that `--help` doesn't have to wait for it
 
 
 def argument_parser():
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(epilog="run `%(prog)s bench --help` for the benchmark mode, and `%(prog)s serve --help` or `%(prog)s client --help` to stream a dashboard to another machine")
     parser.add_argument('--version', action='version', version=f"%(prog)s {__version__}")
-    parser.add_argument('config', metavar='CONFIG', help='path to configuration file')
+    parser.add_argument('--profile', action='store_true', help='record per-widget timings from startup (press P to show them, T to save a trace)')
+    parser.add_argument('--profile-output', metavar='PATH', default=None, help='write a Chrome trace of the recorded timings here on exit')
+    parser.add_argument('--startup-profile', action='store_true', help='print how long each module took to import, and each widget took to start, once the first frame is drawn')
+    parser.add_argument('--watch', action='store_true', help='reload the configuration file when it changes')
+    parser.add_argument('config', metavar='CONFIG', nargs='+', help='path to configuration file; give several to drive a screen from each (settings other than ROOT_OBJECT come from the first)')
     return parser
 
 
+def load_config(path: Path):
+    """Load the config file at `path`, and apply its settings."""
+
+    from rendash.config import current_config
+
+    current_config.load_from_file(path)
+    current_config.apply_settings()
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        from rendash.bench import bench_main
+        return bench_main(sys.argv[2:])
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from rendash.serve import serve_main
+        return serve_main(sys.argv[2:])
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'client':
+        from rendash.stream import client_main
+        return client_main(sys.argv[2:])
+
     parser = argument_parser()
     args = parser.parse_args()
 
+    # time everything from here on, if we've been asked to
+    startup = None
+    if args.startup_profile:
+        from rendash.startup import StartupProfile
+        startup = StartupProfile()
+        startup.install()
+
+    import pygame
+    from rendash.main import main_loop, render_frame
+    from rendash.config import current_config, head_specs
+    from rendash.fetch import current_fetcher
+    from rendash.profiler import current_profiler
+
     # set up pygame
     pygame.init()
 
-    # import config
-    current_config.load_from_file(Path(args.config))
+    # import config, and find out which screens we're driving
+    load_config(Path(args.config[0]))
+    specs = current_config.heads()
+    for path in args.config[1:]:
+        specs.extend(head_specs(current_config.read_file(Path(path)).__dict__))
+
+    # a single screen is driven the same way as it always has been
+    multi_head = len(specs) > 1 or 'HEADS' in current_config.raw_values
+    if args.watch and multi_head:
+        parser.error("--watch doesn't support HEADS or several configs")
 
     # connect to MQTT
     if current_config.mqtt_enabled:
         current_config.mqtt_connect()
 
-    # create screen and clock
-    screen = pygame.display.set_mode((0, 0), current_config.screen_flags(), 32)
+    # create screens and clock
+    heads = None
+    if not multi_head:
+        screen = pygame.display.set_mode((0, 0), current_config.screen_flags(), 32)
+        roots = [current_config.root_object()]
+    else:
+        from rendash.heads import open_heads, heads_loop
+        heads = open_heads(specs)
+        roots = [head.root for head in heads]
+
     clock = pygame.time.Clock()
 
+    # set up profiling, if we've been asked to
+    current_profiler.trace_path = args.profile_output
+    if args.profile or args.profile_output:
+        for root in roots:
+            current_profiler.start(root)
+
     # run the before_start
-    current_config.root_object().before_start()
+    if startup is not None:
+        for root in roots:
+            startup.instrument(root)
+
+    for root in roots:
+        root.start()
+
+    # report how long it took to get the first frame up
+    if startup is not None:
+        if heads is None:
+            render_frame(screen, clock)
+        else:
+            for head in heads:
+                render_frame(head.screen, clock, head.state)
+
+        startup.finish()
+        print(startup.report(), file=sys.stderr)
+
+    # watch the config for changes, if we've been asked to
+    watcher = None
+    if args.watch:
+        from rendash.reload import ConfigWatcher, reload_config
+        watcher = ConfigWatcher(Path(args.config[0]))
+        watcher.start()
 
     # run the main loop
     running = True
     while running:
-        running = main_loop(screen, clock)
+        if watcher is not None and watcher.changed():
+            reload_config(Path(args.config[0]))
+
+        if heads is None:
+            running = main_loop(screen, clock)
+        else:
+            running = heads_loop(heads, clock)
+
+    if watcher is not None:
+        watcher.stop()
 
     # clean up!
-    current_config.root_object().after_stop()
+    if heads is None:
+        current_config.root_object().stop()
+    else:
+        for head in heads:
+            head.root.stop()
+            head.close()
+
     current_config.mqtt_disconnect()
+    current_fetcher.shutdown()
     pygame.quit()
 
+    if current_profiler.enabled and args.profile_output:
+        current_profiler.dump()
+
     return 0
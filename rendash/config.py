@@ -1,14 +1,20 @@
 import types
 import pygame
-import paho.mqtt.client as mqtt
 
-from pathlib import Path
+from rendash.utils import AttrDict
+from rendash.utils.fonts import font_registry
+from rendash.utils.mqtt import MQTTRouter
+from rendash.utils.text import text_cache
+from rendash.fetch import current_fetcher
+from rendash.scheduler import current_scheduler
 
 
 class Config:
     def __init__(self):
         self.raw_values = {}
-        self.mqtt_client = mqtt.Client()
+        self._colors = {}
+        self._mqtt_client = None
+        self.mqtt_router = MQTTRouter(on_pending=current_scheduler.wake)
 
     def __getitem__(self, *args):
         return self.raw_values.__getitem__(*args)
@@ -16,17 +22,41 @@ class Config:
     def __setitem__(self, *args):
         return self.raw_values.__setitem__(*args)
 
-    def load_from_file(self, path):
+    def read_file(self, path):
+        """Execute the config file at `path`, returning its module without
+        loading it."""
+
         d = types.ModuleType("config")
         d.__file__ = str(path)
 
         with open(path, 'rb') as fh:
             exec(compile(fh.read(), str(path), "exec"), d.__dict__)
 
-        self.load_from_object(d)
+        return d
+
+    def load_from_file(self, path):
+        self.load_from_object(self.read_file(path))
 
     def load_from_object(self, obj):
         self.raw_values = dict(obj.__dict__)
+        self._colors = {}
+
+    def apply_settings(self):
+        """Apply the settings from the loaded config to the shared caches and
+        fetcher."""
+
+        text_cache.max_size = self.text_cache_size
+        current_fetcher.workers = self.http_workers
+        current_fetcher.timeout = self.http_timeout
+        current_fetcher.connections_per_host = self.http_connections_per_host
+
+    def _color(self, key: str, default: tuple) -> pygame.Color:
+        # colors are resolved once per config load, rather than on every use
+        color = self._colors.get(key)
+        if color is None:
+            color = self._colors[key] = pygame.Color(self.raw_values.get(key, default))
+
+        return color
 
     @property
     def mqtt_enabled(self):
@@ -36,35 +66,75 @@ class Config:
     def mqtt_server(self):
         return self.raw_values.get('MQTT_SERVER', ('127.0.0.1', 1883))
 
+    @property
+    def mqtt_client(self):
+        # paho is only imported, and the client only created, when it's
+        # first needed, which is never if MQTT isn't enabled
+        if self._mqtt_client is None:
+            import paho.mqtt.client as mqtt
+
+            self._mqtt_client = mqtt.Client()
+            self.mqtt_router.attach(self._mqtt_client)
+
+        return self._mqtt_client
+
     def mqtt_connect(self):
         host, port = self.mqtt_server
         self.mqtt_client.connect_async(host, port=port)
         self.mqtt_client.loop_start()
 
     def mqtt_disconnect(self):
-        self.mqtt_client.disconnect()
+        if self._mqtt_client is not None:
+            self._mqtt_client.disconnect()
+
+    def mqtt_subscribe(self, topic: str, callback):
+        """Call `callback` with every MQTT message on `topic` (which may
+        contain wildcards), with the same arguments as a paho ``on_message``
+        callback. Safe to call before connecting.
+
+        Callbacks are called from the main loop, once per frame at most,
+        with the latest message on each topic.
+        """
+
+        self.mqtt_router.subscribe(topic, callback)
+
+    def mqtt_unsubscribe(self, topic: str, callback):
+        self.mqtt_router.unsubscribe(topic, callback)
 
     @property
     def framerate(self):
         return self.raw_values.get('FRAMERATE', 30)
 
+    @property
+    def http_workers(self):
+        return self.raw_values.get('HTTP_WORKERS', 4)
+
+    @property
+    def http_timeout(self):
+        return self.raw_values.get('HTTP_TIMEOUT', 10)
+
+    @property
+    def http_connections_per_host(self):
+        return self.raw_values.get('HTTP_CONNECTIONS_PER_HOST', 2)
+
+    @property
+    def text_cache_size(self):
+        return self.raw_values.get('TEXT_CACHE_SIZE', 8 * 1024 * 1024)
+
     @property
     def color_bg(self):
-        return pygame.Color(self.raw_values.get('COLOR_BG', (0, 0, 0)))
+        return self._color('COLOR_BG', (0, 0, 0))
 
     @property
     def color_fg(self):
-        return pygame.Color(self.raw_values.get('COLOR_FG', (255, 255, 255)))
+        return self._color('COLOR_FG', (255, 255, 255))
 
     @property
     def font(self):
         font_path = self.raw_values.get('FONT_FACE', 'DeJaVu Sans Mono')
         font_size = self.raw_values.get('FONT_SIZE', 16)
 
-        if Path(font_path).is_file():
-            return pygame.font.Font(font_path, font_size)
-        else:
-            return pygame.font.SysFont(font_path, font_size)
+        return font_registry.get(font_path, font_size)
 
     def screen_flags(self):
         flags = pygame.RESIZABLE | pygame.DOUBLEBUF
@@ -75,11 +145,44 @@ class Config:
 
     def root_object(self):
         root_object = self.raw_values.get('ROOT_OBJECT', None)
+        if root_object is None and len(self.raw_values.get('HEADS', ())) > 0:
+            root_object = self.raw_values['HEADS'][0].get('ROOT_OBJECT', None)
+
         if root_object is None:
             from rendash.plugins.basics import TextDisplay
-            root_object = TextDisplay("No root object in config!")
+            root_object = self.raw_values['ROOT_OBJECT'] = TextDisplay("No root object in config!")
 
         return root_object
+
+    def heads(self) -> list:
+        return head_specs(self.raw_values)
+
+
+def head_specs(values: dict) -> list:
+    """Returns a `list[AttrDict]` of the heads (screens) described by the
+    config `values`: one for each dict in ``HEADS``, or a single head showing
+    ``ROOT_OBJECT`` if there is no ``HEADS``.
+
+    Each dict in ``HEADS`` has a ``ROOT_OBJECT``, and optionally the
+    ``DISPLAY`` index to open it on, its window ``SIZE``, whether it is
+    ``FULLSCREEN`` (defaulting to the config's ``FULLSCREEN``), and a window
+    ``TITLE``.
+    """
+
+    heads = values.get('HEADS', None)
+    if heads is None:
+        heads = [{'ROOT_OBJECT': values.get('ROOT_OBJECT', None)}]
+
+    return [
+        AttrDict(
+            root=head.get('ROOT_OBJECT', None),
+            display=head.get('DISPLAY', None),
+            size=tuple(head.get('SIZE', (0, 0))),
+            fullscreen=head.get('FULLSCREEN', values.get('FULLSCREEN', False)),
+            title=head.get('TITLE', None),
+        )
+        for head in heads
+    ]
     
 
 current_config = Config()
@@ -0,0 +1,274 @@
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from rendash.scheduler import current_scheduler
+
+import re
+import time
+import random
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    def __init__(self):
+        """The cached state of a single URL."""
+
+        self.response = None
+        self.version = 0
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0
+        self.requested_at = 0
+        self.fresh_until = 0
+        self.in_flight = None
+        self.failures = 0
+        self.retry_at = 0
+        self.error = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} version={self.version} fetched_at={self.fetched_at} failures={self.failures}>"
+
+
+# How close to going stale a cached response can be and still be refetched,
+# so that a caller asking again when its own timeout (started just before it
+# last asked) expires gets a new response, rather than the one it has
+MAX_AGE_TOLERANCE = 0.5
+
+
+class ParseError(Exception):
+    def __init__(self, version: int):
+        """Raised (through the ``Future`` returned by ``Fetcher.request``)
+        when the parser fails, with the cache `version` of the response it
+        failed on, so that it isn't parsed again until that changes."""
+
+        super(ParseError, self).__init__(f"failed to parse response version {version}")
+        self.version = version
+
+
+def cache_control_max_age(response) -> float:
+    """Returns how long `response` may be cached for, according to its
+    ``Cache-Control`` header, or 0."""
+
+    cache_control = response.headers.get('Cache-Control', '').lower()
+    if 'no-cache' in cache_control or 'no-store' in cache_control:
+        return 0
+
+    match = re.search(r"max-age\s*=\s*(\d+)", cache_control)
+    if match is None:
+        return 0
+
+    return int(match.group(1))
+
+
+class Fetcher:
+    def __init__(
+        self,
+        workers: int = 4,
+        timeout: float = 10,
+        connections_per_host: int = 2,
+        backoff: float = 5,
+        backoff_max: float = 300,
+    ):
+        """Fetches HTTP resources on a pool of worker threads, so that
+        rendering never waits on the network.
+
+        All requests share one ``requests.Session`` (created, and
+        ``requests`` imported, on the first request), keeping connections
+        alive between requests, with at most `connections_per_host` open
+        connections to any one host. Requests time out after `timeout`
+        seconds unless a timeout is given with the request.
+
+        Responses are cached by URL, and shared between everything that
+        requests that URL:
+
+        * concurrent requests for a URL share a single fetch;
+        * ``ETag`` and ``Last-Modified`` are used to make conditional
+          requests, and ``Cache-Control: max-age`` is respected;
+        * once a response is stale, it is still served while it is
+          revalidated in the background;
+        * failed fetches are retried with jittered exponential backoff,
+          starting at `backoff` seconds, up to `backoff_max` seconds.
+        """
+
+        self.workers = workers
+        self.timeout = timeout
+        self.connections_per_host = connections_per_host
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._session = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} workers={self.workers} timeout={self.timeout}>"
+
+    @property
+    def session(self):
+        if self._session is None:
+            # requests is slow to import, so wait until it's needed
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            adapter = HTTPAdapter(
+                pool_maxsize=self.connections_per_host,
+                pool_block=True,
+            )
+
+            self._session = requests.Session()
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+
+        return self._session
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="rendash-fetch",
+            )
+
+        return self._executor
+
+    def version(self, url: str) -> int:
+        """Returns a number that changes whenever a new response for `url`
+        is cached."""
+
+        entry = self.entries.get(url)
+        return 0 if entry is None else entry.version
+
+    def _revalidate(self, url: str, entry: CacheEntry, timeout: float, requested_at: float) -> tuple:
+        headers = {}
+        with self._lock:
+            if entry.response is not None and entry.etag is not None:
+                headers['If-None-Match'] = entry.etag
+            if entry.response is not None and entry.last_modified is not None:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout)
+            if response.status_code >= 500:
+                response.raise_for_status()
+
+        except Exception as e:
+            with self._lock:
+                entry.failures += 1
+                delay = min(self.backoff * (2 ** (entry.failures - 1)), self.backoff_max)
+                entry.retry_at = time.time() + (delay * random.uniform(0.5, 1.5))
+                entry.error = e
+                entry.in_flight = None
+
+            raise
+
+        with self._lock:
+            if response.status_code != 304 or entry.response is None:
+                entry.response = response
+                entry.version += 1
+                entry.etag = response.headers.get('ETag')
+                entry.last_modified = response.headers.get('Last-Modified')
+
+            # the response's age counts from when it was asked for, like the
+            # caller's own cache timeout does, rather than from when it arrived
+            entry.fetched_at = time.time()
+            entry.requested_at = requested_at
+            entry.fresh_until = requested_at + cache_control_max_age(response)
+            entry.failures = 0
+            entry.retry_at = 0
+            entry.error = None
+            entry.in_flight = None
+
+            return (entry.version, entry.response)
+
+    def _parse(self, result: Future, parser: Callable, response_future: Future):
+        try:
+            (version, response) = response_future.result()
+        except Exception as e:
+            result.set_exception(e)
+            return
+
+        try:
+            result.set_result((version, parser(response)))
+        except Exception as e:
+            error = ParseError(version)
+            error.__cause__ = e
+            result.set_exception(error)
+
+    def request(self, url: str, parser: Callable, max_age: float = 0, timeout: float = None) -> Future:
+        """Get `url`, accepting a cached response up to `max_age` seconds old
+        (or older, if the server said it could be cached for longer), and
+        run it through `parser` in the background.
+
+        Returns a ``Future`` for a `tuple[int, Any]` of the cache version of
+        the response (see ``version``) and the parsed result, which raises a
+        ``ParseError`` if `parser` raises. If the cached
+        response is stale, it is parsed straight away while a fresh one is
+        fetched in the background. The main loop is woken up whenever a
+        fetch or parse completes.
+        """
+
+        with self._lock:
+            entry = self.entries.setdefault(url, CacheEntry())
+
+            now = time.time()
+            soon = now + MAX_AGE_TOLERANCE
+            fresh = entry.response is not None and (soon < entry.requested_at + max_age or soon < entry.fresh_until)
+            if not fresh and entry.in_flight is None and now >= entry.retry_at:
+                entry.in_flight = self.executor.submit(self._revalidate, url, entry, timeout or self.timeout, now)
+                entry.in_flight.add_done_callback(lambda _: current_scheduler.wake())
+
+            if entry.response is not None:
+                response_future = Future()
+                response_future.set_result((entry.version, entry.response))
+            elif entry.in_flight is not None:
+                response_future = entry.in_flight
+            else:
+                response_future = Future()
+                response_future.set_exception(entry.error)
+
+        result = Future()
+        result.add_done_callback(lambda _: current_scheduler.wake())
+        response_future.add_done_callback(lambda _: self.executor.submit(self._parse, result, parser, response_future))
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            self.entries.clear()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+def future_result(future: Future, default = None):
+    """Returns the result of the completed `future`, or logs the exception it
+    raised and returns `default`."""
+
+    try:
+        return future.result()
+    except Exception:
+        logger.exception("background fetch failed")
+        return default
+
+
+def failed_version(future: Future, default: int = 0) -> int:
+    """Returns the cache version of the response the completed `future`
+    (from ``Fetcher.request``) failed to parse, or `default` if it didn't
+    fail to parse one."""
+
+    error = future.exception()
+    if isinstance(error, ParseError):
+        return error.version
+
+    return default
+
+
+current_fetcher = Fetcher()
@@ -0,0 +1,171 @@
+from rendash.config import current_config
+from rendash.main import RenderState, begin_frame, render_frame, dispatch_events
+from rendash.scheduler import current_scheduler
+
+import pygame
+from pygame import Surface
+
+
+# SDL_WINDOWPOS_CENTERED_DISPLAY(0), which _sdl2.video doesn't export
+WINDOWPOS_CENTERED_DISPLAY = 0x2FFF0000
+
+
+class WindowRenderState(RenderState):
+    def __init__(self, root, window, renderer, texture):
+        """A ``RenderState`` for a head with a window of its own, which is
+        drawn to an offscreen surface, and presented by copying the redrawn
+        parts of that into the window's texture."""
+
+        super(WindowRenderState, self).__init__(root)
+        self.window = window
+        self.renderer = renderer
+        self.texture = texture
+
+    def present(self, screen, rects: list, full: bool):
+        if full:
+            self.texture.update(screen)
+        elif len(rects) > 0:
+            for rect in rects:
+                rect = rect.clip(screen.get_rect())
+                if rect.width > 0 and rect.height > 0:
+                    self.texture.update(screen.subsurface(rect), rect)
+        else:
+            return
+
+        self.renderer.clear()
+        self.texture.draw()
+        self.renderer.present()
+
+
+class Head:
+    def __init__(self, root, size: tuple = (0, 0), display: int = None, fullscreen: bool = False, title: str = None):
+        """One screen of the dashboard, showing the `root` plugin.
+
+        The first head opened uses the pygame display, like a single-headed
+        dashboard does; any others get windows of their own, through
+        ``pygame._sdl2.video``. Every head shares the same MQTT client, HTTP
+        cache, and font registry.
+        """
+
+        self.root = root
+        self.size = size
+        self.display = display
+        self.fullscreen = fullscreen
+        self.title = title
+        self.screen = None
+        self.state = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} display={repr(self.display)} root={repr(self.root)}>"
+
+    @property
+    def window_id(self):
+        if isinstance(self.state, WindowRenderState):
+            return self.state.window.id
+
+        return None
+
+    def open(self, primary: bool):
+        title = self.title or "rendash"
+        display = self.display or 0
+
+        if primary:
+            flags = current_config.screen_flags()
+            if self.fullscreen:
+                flags |= pygame.FULLSCREEN
+            else:
+                flags &= ~pygame.FULLSCREEN
+
+            self.screen = pygame.display.set_mode(self.size, flags, 32, display=display)
+            pygame.display.set_caption(title)
+            self.state = RenderState(self.root)
+            return
+
+        from pygame._sdl2.video import Window, Renderer, Texture
+
+        size = self.size
+        if size == (0, 0):
+            size = pygame.display.get_desktop_sizes()[display]
+
+        position = (WINDOWPOS_CENTERED_DISPLAY | display, WINDOWPOS_CENTERED_DISPLAY | display)
+        window = Window(title, size=size, position=position, fullscreen_desktop=self.fullscreen)
+        renderer = Renderer(window)
+        texture = Texture(renderer, window.size, streaming=True)
+
+        # converted to the primary display's format, which the texture uses
+        self.screen = Surface(window.size).convert()
+        self.state = WindowRenderState(self.root, window, renderer, texture)
+
+    def close(self):
+        if isinstance(self.state, WindowRenderState):
+            self.state.window.destroy()
+
+        self.screen = None
+        self.state = None
+
+
+def open_heads(specs: list) -> list:
+    """Open a ``Head`` for each of the head `specs` (see
+    ``rendash.config.head_specs``), returning a `list[Head]`."""
+
+    heads = []
+    for (i, spec) in enumerate(specs):
+        root = spec.root
+        if root is None and i == 0:
+            root = current_config.root_object()
+        elif root is None:
+            from rendash.plugins.basics import TextDisplay
+            root = TextDisplay("No root object in config!")
+
+        head = Head(root, spec.size, spec.display if spec.display is not None else i, spec.fullscreen, spec.title)
+        head.open(primary=(i == 0))
+        heads.append(head)
+
+    return heads
+
+
+def head_for_event(heads: list, event) -> Head:
+    """Returns the head `event` happened in, going by the window it names,
+    or the first head."""
+
+    window = getattr(event, 'window', None)
+    window_id = getattr(window, 'id', window)
+    if window_id is not None:
+        for head in heads[1:]:
+            if head.window_id == window_id:
+                return head
+
+    return heads[0]
+
+
+def heads_loop(heads: list, clock) -> bool:
+    """The equivalent of ``rendash.main.main_loop`` for several heads.
+
+    Heads are all drawn from this thread, one after another, rather than
+    each having a thread of its own: SDL's video and event functions (and
+    SDL_ttf) aren't thread safe, and the widgets of every head share fonts,
+    caches, and the MQTT mailbox, which would all need locking. Only the
+    heads with something to redraw do any work each frame.
+    """
+
+    begin_frame()
+    for head in heads:
+        render_frame(head.screen, clock, head.state, begin=False)
+
+    if current_scheduler.interactive:
+        clock.tick(current_config.framerate)
+    else:
+        clock.tick()
+
+    current_scheduler.run_idle()
+
+    # hand each head the events that happened in its window
+    events = {}
+    for event in current_scheduler.wait():
+        events.setdefault(id(head_for_event(heads, event)), []).append(event)
+
+    for head in heads:
+        if not dispatch_events(head.screen, events.get(id(head), []), head.state):
+            return False
+
+    return True
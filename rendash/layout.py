@@ -0,0 +1,143 @@
+from pygame import Rect
+
+
+class LayoutTracker:
+    def __init__(self):
+        """Tracks changes to the structure of the widget tree.
+
+        Anything that changes where widgets are on screen (apart from the
+        screen itself being resized) should call ``invalidate``, so that
+        anything derived from the layout can be rebuilt.
+        """
+
+        self.generation = 0
+
+    def invalidate(self):
+        self.generation += 1
+
+
+current_layout = LayoutTracker()
+
+
+def subtract_rects(rects: list, cut: Rect) -> list:
+    """Returns a `list[Rect]` covering the area of `rects`, minus the area
+    of `cut`."""
+
+    result = []
+    for rect in rects:
+        if not rect.colliderect(cut):
+            result.append(rect)
+            continue
+
+        clip = rect.clip(cut)
+        if clip.top > rect.top:
+            result.append(Rect(rect.left, rect.top, rect.width, clip.top - rect.top))
+        if clip.bottom < rect.bottom:
+            result.append(Rect(rect.left, clip.bottom, rect.width, rect.bottom - clip.bottom))
+        if clip.left > rect.left:
+            result.append(Rect(rect.left, clip.top, clip.left - rect.left, clip.height))
+        if clip.right < rect.right:
+            result.append(Rect(clip.right, clip.top, rect.right - clip.right, clip.height))
+
+    return result
+
+
+class HitTestIndex:
+    def __init__(self, cell_size: int = 64):
+        """A spatial index of the leaf widgets of a tree, used to route
+        pointer events straight to the widget under the pointer.
+
+        The screen is divided into a grid of `cell_size` pixel square cells,
+        each of which lists the leaf widgets overlapping it.
+        """
+
+        self.cell_size = cell_size
+        self.generation = None
+        self.size = None
+        self.cells = {}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} size={repr(self.size)} cells={len(self.cells)}>"
+
+    def is_current(self, size: tuple) -> bool:
+        return self.generation == current_layout.generation and self.size == size
+
+    def build(self, root, size: tuple):
+        """Index the leaves of the `root` widget, laid out on a screen of
+        the given size."""
+
+        self.generation = current_layout.generation
+        self.size = size
+        self.cells = {}
+
+        for (widget, rect, leaf) in root.layout(Rect((0, 0), size)):
+            if not leaf or rect.width == 0 or rect.height == 0:
+                continue
+
+            for cx in range(rect.left // self.cell_size, ((rect.right - 1) // self.cell_size) + 1):
+                for cy in range(rect.top // self.cell_size, ((rect.bottom - 1) // self.cell_size) + 1):
+                    self.cells.setdefault((cx, cy), []).append((widget, rect))
+
+    def lookup(self, pos: tuple):
+        """Returns a `tuple[BasePlugin, Rect]` of the leaf widget at `pos`
+        and its screen-space rect, or None."""
+
+        cell = (pos[0] // self.cell_size, pos[1] // self.cell_size)
+        for (widget, rect) in self.cells.get(cell, ()):
+            if rect.collidepoint(pos):
+                return (widget, rect)
+
+        return None
+
+
+class DrawList:
+    def __init__(self):
+        """The widget tree flattened into a list of draw commands, so that
+        each frame can be drawn without walking the tree.
+
+        ``commands`` is a `list[tuple[BasePlugin, Rect, Surface]]` of each
+        leaf widget, its screen-space rect, and a subsurface of the screen
+        for it to draw into. ``containers`` is a `list[BasePlugin]` of the
+        displayed plugins that contain others, which still get their
+        ``update`` called every frame. ``gaps`` is a `list[Rect]` of the
+        parts of the screen not covered by any leaf widget (the padding
+        between them), which are the only parts of the screen that need
+        filling with the background color on a full redraw.
+        """
+
+        self.generation = None
+        self.root = None
+        self.surface = None
+        self.size = None
+        self.commands = []
+        self.containers = []
+        self.gaps = []
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} size={repr(self.size)} commands={len(self.commands)}>"
+
+    def is_current(self, root, surface) -> bool:
+        return (
+            self.generation == current_layout.generation
+            and self.root is root
+            and self.surface is surface
+            and self.size == surface.get_size()
+        )
+
+    def compile(self, root, surface):
+        """Flatten the `root` widget, laid out to fill `surface`."""
+
+        self.generation = current_layout.generation
+        self.root = root
+        self.surface = surface
+        self.size = surface.get_size()
+        self.commands = []
+        self.containers = []
+        self.gaps = [surface.get_rect()]
+
+        for (widget, rect, leaf) in root.layout(surface.get_rect()):
+            if not leaf:
+                self.containers.append(widget)
+            elif rect.width > 0 and rect.height > 0:
+                self.commands.append((widget, rect, surface.subsurface(rect)))
+                self.gaps = subtract_rects(self.gaps, rect)
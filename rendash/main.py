@@ -1,20 +1,137 @@
 from rendash.config import current_config
+from rendash.layout import HitTestIndex, DrawList
+from rendash.profiler import current_profiler
+from rendash.scheduler import current_scheduler
+from rendash.utils.surfaces import surface_pool
 
+import time
 import pygame
 
 
-def main_loop(screen, clock):
+# Events that are routed to the widget under the pointer
+POINTER_EVENTS = (
+    pygame.MOUSEBUTTONDOWN,
+    pygame.MOUSEBUTTONUP,
+    pygame.MOUSEMOTION,
+)
+
+
+class RenderState:
+    def __init__(self, root = None):
+        """State that persists between ``main_loop`` calls for one screen.
+
+        The screen shows `root`, or the config's ``ROOT_OBJECT`` if that is
+        None.
+        """
+
+        self.root = root
+        self.force_redraw = True
+        self.hit_index = HitTestIndex()
+        self.draw_list = DrawList()
+
+    def root_object(self):
+        if self.root is not None:
+            return self.root
+
+        return current_config.root_object()
+
+    def present(self, screen, rects: list, full: bool):
+        """Push what has been drawn to `screen` to the display: either the
+        given `rects`, or the whole screen if `full` is True."""
+
+        if full:
+            pygame.display.flip()
+        elif len(rects) > 0:
+            pygame.display.update(rects)
+
+    def request_redraw(self):
+        """Redraw the whole screen on the next frame, rather than just the
+        dirty parts of it."""
+
+        self.force_redraw = True
+
+
+render_state = RenderState()
+
+
+def begin_frame():
+    """Get ready to render a frame, on however many screens."""
+
+    # apply anything that's arrived over MQTT since the last frame
+    current_config.mqtt_router.drain()
+    current_scheduler.begin_frame()
+
+
+def render_frame(screen, clock, state: RenderState = render_state, begin: bool = True) -> list:
+    """Render one frame to `screen`, and push it to the display. If `begin`
+    is False, ``begin_frame`` must have already been called for this frame.
+
+    Returns the `list[Rect]` of the areas that were redrawn.
+    """
+
+    frame_start = time.perf_counter()
+
     # get our root object
-    root_object = current_config.root_object()
+    root_object = state.root_object()
+
+    # redraw everything if we've been asked for a full redraw, otherwise
+    # only the widgets that are dirty
+    force = state.force_redraw
+    state.force_redraw = False
 
-    # fill the background
-    screen.fill(current_config.color_bg)
+    if begin:
+        begin_frame()
 
-    # render our root object
-    root_object.render(screen, clock)
-    
-    # dispatch events
-    for event in pygame.event.get():
+    # let containers (paginators and the like) update, and redraw everything
+    # if any of them have changed
+    for container in state.draw_list.containers:
+        container.update()
+        if container.dirty:
+            container.dirty = False
+            force = True
+
+    # flatten the tree if its structure has changed since last frame (or
+    # the screen has been resized)
+    if force or not state.draw_list.is_current(root_object, screen):
+        state.draw_list.compile(root_object, screen)
+        for container in state.draw_list.containers:
+            container.dirty = False
+
+        force = True
+
+    # fill the gaps between widgets (the widgets fill themselves)
+    if force:
+        color_bg = current_config.color_bg
+        for rect in state.draw_list.gaps:
+            screen.fill(color_bg, rect)
+
+    dirty_rects = []
+    for (widget, rect, surface) in state.draw_list.commands:
+        dirty_rects.extend(widget.render_dirty(surface, clock, rect.topleft, force))
+
+    # draw the profiler overlay on top, keeping it up to date while it's shown
+    current_profiler.record_frame(frame_start, time.perf_counter() - frame_start)
+    if current_profiler.overlay:
+        dirty_rects.append(current_profiler.draw_overlay(screen, current_config.font, current_config.color_fg, current_config.color_bg))
+        current_scheduler.wake_in(0.5)
+
+    # push what we've drawn to the display
+    state.present(screen, dirty_rects, force)
+    if force:
+        return [screen.get_rect()]
+
+    return dirty_rects
+
+
+def dispatch_events(screen, events: list, state: RenderState = render_state) -> bool:
+    """Handle the given pygame `events`, passing them on to the widget tree.
+
+    Returns False if the dashboard should exit.
+    """
+
+    root_object = state.root_object()
+
+    for event in events:
         # allow quitting
         if event.type == pygame.QUIT:
             return False
@@ -24,10 +141,53 @@ def main_loop(screen, clock):
             if event.key == pygame.K_q:
                 return False
 
-        root_object.on_event(event)
+            # toggle the profiler overlay on pressing P
+            elif event.key == pygame.K_p:
+                current_profiler.overlay = not current_profiler.overlay
+                if current_profiler.overlay:
+                    current_profiler.start(root_object)
+                else:
+                    state.request_redraw()
+
+            # write a profile trace on pressing T
+            elif event.key == pygame.K_t and current_profiler.enabled:
+                current_profiler.dump()
+
+        elif event.type == pygame.VIDEORESIZE or event.type == pygame.VIDEOEXPOSE:
+            # our surface contents are no longer valid
+            state.request_redraw()
+
+            # and offscreen surfaces of the old sizes won't be needed again
+            if event.type == pygame.VIDEORESIZE:
+                surface_pool.clear()
+
+        if event.type in POINTER_EVENTS:
+            # send pointer events straight to the widget under the pointer
+            if not state.hit_index.is_current(screen.get_size()):
+                state.hit_index.build(root_object, screen.get_size())
 
-    # flip the display
-    pygame.display.flip()
-    clock.tick(current_config.framerate)
+            hit = state.hit_index.lookup(event.pos)
+            if hit is not None:
+                (widget, rect) = hit
+                event.pos = (event.pos[0] - rect.left, event.pos[1] - rect.top)
+                widget.on_event(event)
+
+        else:
+            root_object.on_event(event)
 
     return True
+
+
+def main_loop(screen, clock, state: RenderState = render_state):
+    render_frame(screen, clock, state)
+
+    # only run at the full framerate while someone is interacting with us
+    if current_scheduler.interactive:
+        clock.tick(current_config.framerate)
+    else:
+        clock.tick()
+
+    # use any spare time before the next frame, then sleep until something
+    # needs redrawing, and dispatch events
+    current_scheduler.run_idle()
+    return dispatch_events(screen, current_scheduler.wait(), state)
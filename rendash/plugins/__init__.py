@@ -1,6 +1,33 @@
+from rendash.config import current_config
+from rendash.scheduler import current_scheduler
+
+import importlib
+
+from pygame import Surface, Rect
 from pygame.event import Event
+from pygame.time import Clock
 
 class BasePlugin:
+    dirty = True
+    started = False
+    paused = False
+
+    def __new__(cls, *args, **kwargs):
+        plugin = super(BasePlugin, cls).__new__(cls)
+
+        # remembered so that the plugin can be compared against the same
+        # plugin in a reloaded config, see ``rendash.reload``
+        plugin.init_args = (args, kwargs)
+        return plugin
+
+    # whether ``render`` draws over every pixel of the surface it's given -
+    # if not, the surface is filled with the background color first
+    opaque = False
+
+    # whether this plugin calls ``mark_dirty`` whenever its output changes -
+    # if not, it is redrawn every frame, as plugins always used to be
+    tracks_dirty = False
+
     def before_start(self):
         pass
 
@@ -9,3 +36,147 @@ class BasePlugin:
 
     def on_event(self, event: Event):
         pass
+
+    def start(self):
+        """Call ``before_start``, unless this plugin has already been
+        started. Containers should start the plugins they contain with this,
+        rather than calling ``before_start`` directly."""
+
+        if not self.started:
+            self.started = True
+            self.before_start()
+
+    def stop(self):
+        """Call ``after_stop``, if this plugin has been started."""
+
+        if self.started:
+            self.started = False
+            self.after_stop()
+
+    def pause(self):
+        """Called when this plugin is no longer displayed, such as when the
+        page it is on is switched away from. Until ``resume`` is called,
+        plugins should stop polling for changes, and only keep track of the
+        latest value of anything pushed to them.
+
+        By default, this pauses every plugin this plugin contains.
+        """
+
+        self.paused = True
+        for child in self.children():
+            child.pause()
+
+    def resume(self):
+        """Called when a paused plugin is displayed again. Plugins should
+        catch up with anything that changed while they were paused, and call
+        ``mark_dirty`` if that changes their output.
+
+        By default, this resumes every plugin this plugin contains. Nothing
+        is marked dirty: a plugin that called ``mark_dirty`` while paused is
+        still dirty, and one that didn't can be shown as it was last drawn
+        (such as from a ``Paginator``'s page cache).
+        """
+
+        self.paused = False
+        for child in self.children():
+            child.resume()
+
+    def children(self) -> list:
+        """Returns a `list[BasePlugin]` of the plugins this plugin contains,
+        whether or not they are currently displayed."""
+
+        return []
+
+    def mark_dirty(self):
+        """Flag this plugin as needing to be redrawn on the next frame."""
+
+        self.dirty = True
+
+    def update(self):
+        """Called once per frame, before rendering, whether or not this plugin
+        is dirty. Plugins that poll for changes should do so here, and call
+        ``mark_dirty`` if their output has changed.
+        """
+
+        pass
+
+    def render_dirty(self, surface: Surface, clock: Clock, offset: tuple = (0, 0), force: bool = False) -> list:
+        """Render this plugin to `surface` if it is dirty (or if `force` is
+        True, or it doesn't set ``tracks_dirty``), and return a `list[Rect]`
+        of the screen-space areas that were redrawn.
+
+        `offset` is the screen-space position of the top left corner of
+        `surface`.
+        """
+
+        self.update()
+        if not self.tracks_dirty:
+            # keep running at the framerate, so this plugin can animate
+            current_scheduler.wake_in(1 / current_config.framerate)
+        elif not (force or self.dirty):
+            return []
+
+        self.dirty = False
+        if not self.opaque:
+            surface.fill(current_config.color_bg)
+
+        self.render(surface, clock)
+        return [Rect(offset, surface.get_size())]
+
+    def layout(self, rect: Rect):
+        """Yields a `tuple[BasePlugin, Rect, bool]` for this plugin and every
+        plugin drawn inside it, with the screen-space rect each one is drawn
+        to, and whether it is a leaf (draws itself, rather than containing
+        other plugins), when this plugin is drawn to `rect`.
+        """
+
+        yield (self, rect, True)
+
+
+def walk(plugin: BasePlugin):
+    """Yields `plugin`, and every plugin it contains (displayed or not),
+    depth first."""
+
+    seen = set()
+    stack = [plugin]
+    while len(stack) > 0:
+        plugin = stack.pop()
+        if id(plugin) in seen:
+            continue
+
+        seen.add(id(plugin))
+        yield plugin
+        stack.extend(reversed(plugin.children()))
+
+
+# The plugins that can be imported straight from ``rendash.plugins``, and the
+# modules they're in. Each module is only imported when one of its plugins is
+# first used, so configs only pay for the plugins they use.
+LAZY_PLUGINS = {
+    'TextDisplay': 'basics',
+    'BoolDisplay': 'basics',
+    'Button': 'basics',
+    'ClockDisplay': 'clock',
+    'WorldClockGrid': 'clock',
+    'HTTPTextDisplay': 'http',
+    'HTTPBoolDisplay': 'http',
+    'MQTTTextDisplay': 'mqtt',
+    'MQTTBoolDisplay': 'mqtt',
+    'MQTTButton': 'mqtt',
+    'MQTTPaginator': 'mqtt',
+    'Paginator': 'page',
+    'HorizontalSplit': 'splits',
+    'VerticalSplit': 'splits',
+}
+
+
+def __getattr__(name: str):
+    module = LAZY_PLUGINS.get(name)
+    if module is None:
+        raise AttributeError(f"module {repr(__name__)} has no attribute {repr(name)}")
+
+    return getattr(importlib.import_module(f"{__name__}.{module}"), name)
+
+
+def __dir__() -> list:
+    return sorted(list(globals().keys()) + list(LAZY_PLUGINS.keys()))
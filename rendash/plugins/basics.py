@@ -12,6 +12,9 @@ from pygame.event import Event
 
 
 class TextDisplay(BasePlugin):
+    opaque = True
+    tracks_dirty = True
+
     def __init__(
         self,
         text: str,
@@ -20,11 +23,16 @@ class TextDisplay(BasePlugin):
         color_fg: Color = None,
         center: bool = True,
         padding: int = 8,
+        glyph_atlas: bool = False,
     ):
         """Display a given string.
     
         If any of the `font`, `color_bg`, or `color_fg` parameters are None,
         the values from ``current_config`` are used.
+
+        If `glyph_atlas` is True, lines made up of digits, punctuation, and
+        units are drawn from a ``rendash.utils.text.GlyphAtlas``, rather than
+        rendered each time they change.
         """
 
         self.text = text
@@ -33,9 +41,20 @@ class TextDisplay(BasePlugin):
         self.color_fg = color_fg
         self.center = center
         self.padding = padding
+        self.glyph_atlas = glyph_atlas
 
     def __repr__(self):
         return f"<{self.__class__.__name__} {repr(self.text)}>"
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        if not hasattr(self, '_text') or text != self._text:
+            self._text = text
+            self.mark_dirty()
     
     def before_start(self):
         self.font = self.font or current_config.font
@@ -52,10 +71,13 @@ class TextDisplay(BasePlugin):
             surface.get_height() - self.padding,
         )
 
-        draw_text(self.text, surface, draw_rect, self.font, self.color_fg, center=self.center)
+        draw_text(self.text, surface, draw_rect, self.font, self.color_fg, center=self.center, atlas=self.glyph_atlas)
 
 
 class BoolDisplay(BasePlugin):
+    opaque = True
+    tracks_dirty = True
+
     def __init__(
         self,
         value: Any, # Union[bool, None]
@@ -112,6 +134,16 @@ class BoolDisplay(BasePlugin):
     def __repr__(self):
         return f"<{self.__class__.__name__} {repr(self.value)}>"
 
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if not hasattr(self, '_value') or value != self._value:
+            self._value = value
+            self.mark_dirty()
+
     def before_start(self):
         self.font = self.font or current_config.font
         self.color_bg_true = self.color_bg_true or current_config.color_bg
@@ -187,8 +219,10 @@ class Button(TextDisplay):
     def on_event(self, event: Event):
         if event.type == pygame.MOUSEBUTTONDOWN:
             (self.color_bg, self.color_fg) = (self._color_fg, self._color_bg)
+            self.mark_dirty()
 
         elif event.type == pygame.MOUSEBUTTONUP:
             (self.color_bg, self.color_fg) = (self._color_bg, self._color_fg)
+            self.mark_dirty()
             self.callback(event)
 
@@ -2,10 +2,17 @@ from typing import Union
 
 from rendash.plugins import BasePlugin
 from rendash.config import current_config
-from rendash.utils.text import draw_text
+from rendash.scheduler import current_scheduler
+from rendash.utils import AttrDict
+from rendash.utils.fonts import font_registry
+from rendash.utils.surfaces import surface_pool
+from rendash.utils.text import draw_text, text_cache, glyph_atlas
 
 from zoneinfo import ZoneInfo
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+import math
+import time
 
 import pygame
 from pygame import Surface, Rect, Color
@@ -15,6 +22,9 @@ from pygame.event import Event
 
 
 class ClockDisplay(BasePlugin):
+    opaque = True
+    tracks_dirty = True
+
     def __init__(
         self,
         text: str,
@@ -24,11 +34,19 @@ class ClockDisplay(BasePlugin):
         color_bg: Color = None,
         color_fg: Color = None,
         padding: int = 8,
+        seconds: bool = False,
+        glyph_atlas: bool = False,
     ):
         """Display the time in a given IANA timezone.
     
         If any of the `font`, `color_bg`, or `color_fg` parameters are None,
         the values from ``current_config`` are used.
+
+        If `seconds` is True, the time is displayed with seconds, and only
+        the seconds are redrawn when nothing else has changed.
+
+        If `glyph_atlas` is True, the date and time are drawn from a
+        ``rendash.utils.text.GlyphAtlas`` rather than rendered with the font.
         """
 
         self.text = text
@@ -38,6 +56,12 @@ class ClockDisplay(BasePlugin):
         self.color_bg = color_bg
         self.color_fg = color_fg
         self.padding = padding
+        self.seconds = seconds
+        self.glyph_atlas = glyph_atlas
+
+        self._layouts = {}
+        self._drawn = None
+        self._drawn_text = None
 
     def __repr__(self):
         return f"<{self.__class__.__name__} tz={repr(self.tz)}>"
@@ -48,66 +72,380 @@ class ClockDisplay(BasePlugin):
         self.color_bg = self.color_bg or current_config.color_bg
         self.color_fg = self.color_fg or current_config.color_fg
 
-    def render(self, surface: Surface, clock: Clock):
-        surface.fill(self.color_bg)
+        self._layouts = {}
+        self._drawn = None
 
-        # Draw the description text
-        desc_surface = Surface((
-            surface.get_width() - (self.padding * 2),
-            int((surface.get_height() / 4) * 1) - self.padding,
-        ))
-
-        desc_surface.fill(self.color_bg)
-        draw_text(str(self.text), desc_surface, desc_surface.get_rect(), self.font_desc, self.color_fg, center=True)
-
-        desc_draw_rect = Rect(
-            self.padding,
-            #int((surface.get_height() / 4) * 2) + self.padding,
-            self.padding,
-            desc_surface.get_width(),
-            desc_surface.get_height(),
-        )
+    def after_stop(self):
+        for layout in self._layouts.values():
+            surface_pool.release(layout.desc_surface)
+            surface_pool.release(layout.tz_surface)
+
+        self._layouts = {}
 
-        surface.blit(desc_surface, desc_draw_rect)
+    def _clock_text(self) -> tuple:
+        """Returns the `(date, hours and minutes, seconds)` to display."""
 
-        # Draw the time
         current_time = datetime.now(tz=self.tz)
-        clock_text = [
+        return (
             current_time.strftime("%Y-%m-%d"),
-            current_time.strftime("%H:%M"),
-        ]
-
-        clock_surface = Surface((
-            surface.get_width() - (self.padding * 2),
-            int((surface.get_height() / 4) * 2) - self.padding,
-        ))
-
-        clock_surface.fill(self.color_bg)
-        draw_text(clock_text, clock_surface, clock_surface.get_rect(), self.font_time, self.color_fg, center=True)
-
-        clock_draw_rect = Rect(
-            self.padding,
-            int((surface.get_height() / 4) * 1) + self.padding,
-            clock_surface.get_width(),
-            clock_surface.get_height(),
+            current_time.strftime("%H:%M:" if self.seconds else "%H:%M"),
+            current_time.strftime("%S") if self.seconds else "",
         )
 
-        surface.blit(clock_surface, clock_draw_rect)
+    def next_deadline(self) -> float:
+        """Returns the ``time.time()`` timestamp when the displayed time will
+        next change."""
+
+        step = 1 if self.seconds else 60
+        return ((time.time() // step) + 1) * step
+
+    def update(self):
+        # only redraw when the displayed time has actually changed
+        self._current = self._clock_text()
+        current_scheduler.wake_at(self.next_deadline())
 
-        # Draw the timezone
-        tz_surface = Surface((
-            surface.get_width() - (self.padding * 2),
-            int((surface.get_height() / 3) * 1) - self.padding,
-        ))
+    def _layout(self, size: tuple):
+        """Returns the layout for a surface of the given `size`, with the
+        description and timezone text already rendered."""
 
-        tz_surface.fill(self.color_bg)
-        draw_text(str(self.tz), tz_surface, tz_surface.get_rect(), self.font_desc, self.color_fg, center=True)
+        layout = self._layouts.get(size)
+        if layout is not None:
+            return layout
 
-        tz_draw_rect = Rect(
-            self.padding,
-            int((surface.get_height() / 4) * 3) + self.padding,
-            tz_surface.get_width(),
-            tz_surface.get_height(),
+        (width, height) = size
+        bounds = Rect(0, 0, width, height)
+
+        # only keep the layout for the size we're currently drawn at
+        for old in self._layouts.values():
+            surface_pool.release(old.desc_surface)
+            surface_pool.release(old.tz_surface)
+
+        self._layouts = {}
+        layout = self._layouts[size] = AttrDict(
+            desc_rect=Rect(
+                self.padding,
+                self.padding,
+                width - (self.padding * 2),
+                int((height / 4) * 1) - self.padding,
+            ).clip(bounds),
+            time_rect=Rect(
+                self.padding,
+                int((height / 4) * 1) + self.padding,
+                width - (self.padding * 2),
+                int((height / 4) * 2) - self.padding,
+            ).clip(bounds),
+            # this runs off the bottom of the surface, as it always has; the
+            # blit clips it, so the text stays where it has always been
+            tz_rect=Rect(
+                self.padding,
+                int((height / 4) * 3) + self.padding,
+                width - (self.padding * 2),
+                int((height / 3) * 1) - self.padding,
+            ),
         )
 
-        surface.blit(tz_surface, tz_draw_rect)
+        layout.desc_surface = self._render_block(str(self.text), layout.desc_rect.size)
+        layout.tz_surface = self._render_block(str(self.tz), layout.tz_rect.size)
+        return layout
+
+    def _render_block(self, text: str, size: tuple) -> Surface:
+        surface = surface_pool.acquire(size)
+        surface.fill(self.color_bg)
+        draw_text(text, surface, surface.get_rect(), self.font_desc, self.color_fg, center=True)
+        return surface
+
+    def _atlas(self, text: str):
+        """Returns the ``GlyphAtlas`` to draw `text` from, or None if it
+        should be rendered with the font."""
+
+        if not self.glyph_atlas:
+            return None
+
+        atlas = glyph_atlas(self.font_time, self.color_fg)
+        return atlas if atlas.supports(text) else None
+
+    def _text_width(self, text: str) -> int:
+        atlas = self._atlas(text)
+        if atlas is not None:
+            return atlas.size(text)[0]
+
+        return self.font_time.size(text)[0]
+
+    def _blit_text(self, surface: Surface, text: str, pos: tuple):
+        atlas = self._atlas(text)
+        if atlas is not None:
+            atlas.blit(surface, text, pos)
+        else:
+            surface.blit(text_cache.render(self.font_time, text, True, self.color_fg), pos)
+
+    def _time_positions(self, rect: Rect, current: tuple) -> list:
+        """Returns where each part of the time is drawn within `rect`, as a
+        `list[tuple[str, tuple[int, int]]]` of each piece of text and its
+        position, laid out the same way as ``draw_text`` would."""
+
+        (date, time_text, seconds_text) = current
+        line_spacing = -2
+        line_height = font_registry.line_height(self.font_time) + line_spacing
+        lines = 2 if (line_height * 2) <= rect.height else 1
+
+        y = (rect.height / 2) - ((line_height * lines) / 2)
+        positions = []
+
+        date_width = self._text_width(date)
+        positions.append((date, ((rect.width / 2) - (date_width / 2), y)))
+
+        if lines == 2:
+            y += line_height
+
+            time_width = self._text_width(time_text)
+            seconds_width = self._text_width(seconds_text) if seconds_text else 0
+            x = (rect.width / 2) - ((time_width + seconds_width) / 2)
+            positions.append((time_text, (x, y)))
+            if seconds_text:
+                positions.append((seconds_text, (x + time_width, y)))
+
+        return positions
+
+    def _draw_time(self, surface: Surface, layout, current: tuple) -> Rect:
+        """Redraw the time, or just the seconds if that's all that has
+        changed. Returns the rect that was redrawn, within `surface`."""
+
+        rect = layout.time_rect
+        positions = self._time_positions(rect, current)
+
+        # if only the seconds have changed, and they're the same width as
+        # before, redraw just the seconds
+        drawn = self._drawn
+        if drawn is not None and len(positions) == 3 and len(drawn) == 3:
+            if positions[:2] == drawn[:2]:
+                (text, (x, y)) = positions[2]
+                (old_text, (old_x, _)) = drawn[2]
+                width = self._text_width(text)
+                if x == old_x and width == self._text_width(old_text):
+                    seconds_rect = Rect(rect.left + int(x), rect.top + int(y), width, font_registry.line_height(self.font_time))
+                    seconds_rect = seconds_rect.clip(rect)
+
+                    surface.fill(self.color_bg, seconds_rect)
+                    surface.set_clip(rect)
+                    self._blit_text(surface, text, (rect.left + x, rect.top + y))
+                    surface.set_clip(None)
+
+                    self._drawn = positions
+                    return seconds_rect
+
+        surface.fill(self.color_bg, rect)
+        surface.set_clip(rect)
+        for (text, (x, y)) in positions:
+            self._blit_text(surface, text, (rect.left + x, rect.top + y))
+        surface.set_clip(None)
+
+        self._drawn = positions
+        return rect
+
+    def render_dirty(self, surface: Surface, clock: Clock, offset: tuple = (0, 0), force: bool = False) -> list:
+        self.update()
+
+        if force or self.dirty:
+            self.dirty = False
+            self.render(surface, clock)
+            return [Rect(offset, surface.get_size())]
+
+        if self._drawn is None or self._current != self._drawn_text:
+            layout = self._layout(surface.get_size())
+            rect = self._draw_time(surface, layout, self._current)
+            self._drawn_text = self._current
+            return [rect.move(offset)]
+
+        return []
+
+    def render(self, surface: Surface, clock: Clock):
+        surface.fill(self.color_bg)
+
+        layout = self._layout(surface.get_size())
+        surface.blit(layout.desc_surface, layout.desc_rect)
+        surface.blit(layout.tz_surface, layout.tz_rect)
+
+        # always redraw the whole time when redrawing everything
+        current = self._clock_text()
+        self._drawn = None
+        self._draw_time(surface, layout, current)
+        self._drawn_text = current
+
+
+class WorldClockGrid(BasePlugin):
+    opaque = True
+    tracks_dirty = True
+
+    def __init__(
+        self,
+        zones: list,
+        columns: int = None,
+        font_time: Font = None,
+        font_desc: Font = None,
+        color_bg: Color = None,
+        color_fg: Color = None,
+        padding: int = 8,
+        seconds: bool = False,
+    ):
+        """Display the time in many IANA timezones, in a grid.
+
+        `zones` is a list of timezone names, or of `(label, timezone name)`
+        tuples. The grid has `columns` columns, defaulting to as close to
+        square as possible.
+
+        The current time is read once per update, and converted to every
+        timezone at once (timezones sharing a UTC offset are only formatted
+        once). Only the cells whose displayed time has changed are redrawn.
+
+        If any of the `font`, `color_bg`, or `color_fg` parameters are None,
+        the values from ``current_config`` are used. If `seconds` is True,
+        the time is displayed with seconds.
+        """
+
+        self.zones = []
+        for zone in zones:
+            if not isinstance(zone, tuple):
+                zone = (zone, zone)
+
+            (label, tz) = zone
+            self.zones.append((label, ZoneInfo(tz)))
+
+        self.columns = columns or max(math.ceil(math.sqrt(len(self.zones))), 1)
+        self.font_time = font_time
+        self.font_desc = font_desc
+        self.color_bg = color_bg
+        self.color_fg = color_fg
+        self.padding = padding
+        self.seconds = seconds
+
+        self._layout_size = None
+        self._cells = []
+        self._current = []
+        self._drawn = []
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} zones={len(self.zones)}>"
+
+    def before_start(self):
+        self.font_time = self.font_time or current_config.font
+        self.font_desc = self.font_desc or current_config.font
+        self.color_bg = self.color_bg or current_config.color_bg
+        self.color_fg = self.color_fg or current_config.color_fg
+
+        self._layout_size = None
+
+    def after_stop(self):
+        for cell in self._cells:
+            surface_pool.release(cell.label_surface)
+
+        self._layout_size = None
+        self._cells = []
+
+    def _clock_text(self) -> list:
+        """Returns the `[date, time]` lines to display for each zone."""
+
+        now = datetime.now(tz=timezone.utc)
+        time_format = "%H:%M:%S" if self.seconds else "%H:%M"
+
+        by_offset = {}
+        texts = []
+        for (_, tz) in self.zones:
+            # zones showing the same wall clock time share their text
+            local = now.astimezone(tz)
+            offset = local.utcoffset()
+            text = by_offset.get(offset)
+            if text is None:
+                text = by_offset[offset] = [local.strftime("%Y-%m-%d"), local.strftime(time_format)]
+
+            texts.append(text)
+
+        return texts
+
+    def next_deadline(self) -> float:
+        """Returns the ``time.time()`` timestamp when the displayed times
+        will next change."""
+
+        step = 1 if self.seconds else 60
+        return ((time.time() // step) + 1) * step
+
+    def update(self):
+        self._current = self._clock_text()
+        current_scheduler.wake_at(self.next_deadline())
+
+    def _layout(self, size: tuple):
+        """Work out the rects of each cell for a surface of the given
+        `size`, and render each cell's label."""
+
+        if size == self._layout_size:
+            return
+
+        (width, height) = size
+        rows = max(math.ceil(len(self.zones) / self.columns), 1)
+        cell_width = width // self.columns
+        cell_height = height // rows
+        bounds = Rect(0, 0, width, height)
+
+        for cell in self._cells:
+            surface_pool.release(cell.label_surface)
+
+        self._layout_size = size
+        self._cells = []
+        self._drawn = [None] * len(self.zones)
+
+        for (i, (label, _)) in enumerate(self.zones):
+            cell = Rect(
+                ((i % self.columns) * cell_width) + self.padding,
+                ((i // self.columns) * cell_height) + self.padding,
+                cell_width - (self.padding * 2),
+                cell_height - (self.padding * 2),
+            ).clip(bounds)
+
+            label_rect = Rect(cell.left, cell.top, cell.width, cell.height // 3)
+            time_rect = Rect(cell.left, label_rect.bottom, cell.width, cell.height - label_rect.height)
+
+            label_surface = surface_pool.acquire(label_rect.size)
+            label_surface.fill(self.color_bg)
+            draw_text(str(label), label_surface, label_surface.get_rect(), self.font_desc, self.color_fg, center=True)
+
+            self._cells.append(AttrDict(
+                label_rect=label_rect,
+                label_surface=label_surface,
+                time_rect=time_rect,
+            ))
+
+    def _draw_cell_time(self, surface: Surface, i: int):
+        rect = self._cells[i].time_rect
+        self._drawn[i] = self._current[i]
+        if rect.width <= 0 or rect.height <= 0:
+            return
+
+        cell_surface = surface.subsurface(rect)
+        cell_surface.fill(self.color_bg)
+        draw_text(self._current[i], cell_surface, cell_surface.get_rect(), self.font_time, self.color_fg, center=True)
+
+    def render_dirty(self, surface: Surface, clock: Clock, offset: tuple = (0, 0), force: bool = False) -> list:
+        self.update()
+
+        if force or self.dirty or surface.get_size() != self._layout_size:
+            self.dirty = False
+            self.render(surface, clock)
+            return [Rect(offset, surface.get_size())]
+
+        rects = []
+        for i in range(len(self.zones)):
+            if self._current[i] != self._drawn[i]:
+                self._draw_cell_time(surface, i)
+                rects.append(self._cells[i].time_rect.move(offset))
+
+        return rects
+
+    def render(self, surface: Surface, clock: Clock):
+        surface.fill(self.color_bg)
+
+        if len(self._current) != len(self.zones):
+            self._current = self._clock_text()
+
+        self._layout(surface.get_size())
+        for (i, cell) in enumerate(self._cells):
+            surface.blit(cell.label_surface, cell.label_rect)
+            self._draw_cell_time(surface, i)
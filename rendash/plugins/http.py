@@ -1,14 +1,13 @@
 from collections.abc import Callable
 
-from rendash.config import current_config
+from rendash.fetch import current_fetcher, future_result, failed_version
+from rendash.scheduler import current_scheduler
 from rendash.plugins.basics import TextDisplay, BoolDisplay
 
-from pygame import Surface, Rect, Color
+from pygame import Color
 from pygame.font import Font
-from pygame.time import Clock
 
 import time
-import requests
 
 
 class HTTPTextDisplay(TextDisplay):
@@ -22,11 +21,16 @@ class HTTPTextDisplay(TextDisplay):
         color_fg: Color = None,
         center: bool = True,
         padding: int = 8,
+        timeout: float = None,
     ):
         """Displays text from the given ``url``, parsed by the ``parser``
         callable before display.
 
-        Results are cached for ``cache_timeout`` seconds.
+        Results are cached for ``cache_timeout`` seconds. The URL is fetched,
+        and parsed, in the background; requests time out after ``timeout``
+        seconds (defaulting to the ``HTTP_TIMEOUT`` config value). Responses
+        are shared with every other widget using the same ``url``, see
+        ``rendash.fetch.Fetcher``.
 
         Other parameters are the same as ``rendash.plugins.basics.TextDisplay``
         """
@@ -44,15 +48,31 @@ class HTTPTextDisplay(TextDisplay):
         self.http_parser = parser
         self.cache_timeout = cache_timeout
         self.cache_last = 0
+        self.http_timeout = timeout
+        self.http_future = None
+        self.http_version = 0
 
     def cache_update(self):
-        if time.time() >= self.cache_last + self.cache_timeout:
+        # swap in the result of the last fetch, once it's done - if it failed
+        # to parse, remember which version so it isn't parsed again every frame
+        if self.http_future is not None and self.http_future.done():
+            version = failed_version(self.http_future, self.http_version)
+            (self.http_version, self.text) = future_result(self.http_future, (version, self.text))
+            self.http_future = None
+
+        # and start another if our cache has expired, or if someone else
+        # fetching the same URL has got a newer response
+        expired = time.time() >= self.cache_last + self.cache_timeout
+        if self.http_future is None and (expired or current_fetcher.version(self.http_url) != self.http_version):
             self.cache_last = time.time()
-            self.text = self.http_parser(requests.get(self.http_url))
-    
-    def render(self, surface: Surface, clock: Clock):
-        self.cache_update()
-        super(HTTPTextDisplay, self).render(surface, clock)
+            self.http_future = current_fetcher.request(self.http_url, self.http_parser, self.cache_timeout, self.http_timeout)
+
+        current_scheduler.wake_at(self.cache_last + self.cache_timeout)
+
+    def update(self):
+        # don't poll while paused, the next update after resuming catches up
+        if not self.paused:
+            self.cache_update()
 
 
 class HTTPBoolDisplay(BoolDisplay):
@@ -73,11 +93,16 @@ class HTTPBoolDisplay(BoolDisplay):
         multi_line: bool = False,
         center: bool = True,
         padding: int = 8,
+        timeout: float = None,
     ):
         """Displays a boolean from the given ``url``, parsed by the ``parser``
         callable before display.
 
-        Results are cached for ``cache_timeout`` seconds.
+        Results are cached for ``cache_timeout`` seconds. The URL is fetched,
+        and parsed, in the background; requests time out after ``timeout``
+        seconds (defaulting to the ``HTTP_TIMEOUT`` config value). Responses
+        are shared with every other widget using the same ``url``, see
+        ``rendash.fetch.Fetcher``.
 
         Other parameters are the same as ``rendash.plugins.basics.BoolDisplay``
         """
@@ -102,12 +127,28 @@ class HTTPBoolDisplay(BoolDisplay):
         self.http_parser = parser
         self.cache_timeout = cache_timeout
         self.cache_last = 0
+        self.http_timeout = timeout
+        self.http_future = None
+        self.http_version = 0
 
     def cache_update(self):
-        if time.time() >= self.cache_last + self.cache_timeout:
+        # swap in the result of the last fetch, once it's done - if it failed
+        # to parse, remember which version so it isn't parsed again every frame
+        if self.http_future is not None and self.http_future.done():
+            version = failed_version(self.http_future, self.http_version)
+            (self.http_version, self.value) = future_result(self.http_future, (version, self.value))
+            self.http_future = None
+
+        # and start another if our cache has expired, or if someone else
+        # fetching the same URL has got a newer response
+        expired = time.time() >= self.cache_last + self.cache_timeout
+        if self.http_future is None and (expired or current_fetcher.version(self.http_url) != self.http_version):
             self.cache_last = time.time()
-            self.value = self.http_parser(requests.get(self.http_url))
-    
-    def render(self, surface: Surface, clock: Clock):
-        self.cache_update()
-        super(HTTPBoolDisplay, self).render(surface, clock)
+            self.http_future = current_fetcher.request(self.http_url, self.http_parser, self.cache_timeout, self.http_timeout)
+
+        current_scheduler.wake_at(self.cache_last + self.cache_timeout)
+
+    def update(self):
+        # don't poll while paused, the next update after resuming catches up
+        if not self.paused:
+            self.cache_update()
@@ -6,8 +6,38 @@ from pygame import Surface, Rect, Color
 from pygame.font import Font
 from pygame.time import Clock
 
+import logging
 
-class MQTTTextDisplay(TextDisplay):
+
+logger = logging.getLogger(__name__)
+
+
+class MQTTSubscriber:
+    """Mixin for plugins that subscribe to MQTT topics.
+
+    Messages are passed to ``mqtt_callback``, except while the plugin is
+    paused, when only the latest message is kept. That message is applied
+    when the plugin is resumed.
+    """
+
+    mqtt_held = None
+
+    def mqtt_receive(self, mqtt_client, mqtt_userdata, mqtt_message):
+        if self.paused:
+            self.mqtt_held = (mqtt_client, mqtt_userdata, mqtt_message)
+            return
+
+        self.mqtt_callback(mqtt_client, mqtt_userdata, mqtt_message)
+
+    def resume(self):
+        super(MQTTSubscriber, self).resume()
+
+        if self.mqtt_held is not None:
+            (held, self.mqtt_held) = (self.mqtt_held, None)
+            self.mqtt_callback(*held)
+
+
+class MQTTTextDisplay(MQTTSubscriber, TextDisplay):
     def __init__(
         self,
         topic: str,
@@ -16,8 +46,15 @@ class MQTTTextDisplay(TextDisplay):
         color_fg: Color = None,
         center: bool = True,
         padding: int = 8,
+        glyph_atlas: bool = False,
     ):
-        """Displays text from the MQTT topic `topic`.
+        """Displays text from the MQTT topic `topic`, which may contain
+        wildcards (in which case the last matching message is displayed).
+
+        If `glyph_atlas` is True, messages made up of digits, punctuation,
+        and units (like most sensor readings) are drawn from a
+        ``rendash.utils.text.GlyphAtlas``, rather than rendered each time
+        they change.
 
         Other parameters are the same as ``rendash.plugins.basics.TextDisplay``
         """
@@ -29,21 +66,24 @@ class MQTTTextDisplay(TextDisplay):
             color_fg,
             center,
             padding,
+            glyph_atlas,
         )
 
         self.topic = topic
 
     def before_start(self):
         super(MQTTTextDisplay, self).before_start()
-        current_config.mqtt_client.message_callback_add(self.topic, self.mqtt_callback)
-        current_config.mqtt_client.subscribe(self.topic)
+        current_config.mqtt_subscribe(self.topic, self.mqtt_receive)
+
+    def after_stop(self):
+        current_config.mqtt_unsubscribe(self.topic, self.mqtt_receive)
+        super(MQTTTextDisplay, self).after_stop()
 
     def mqtt_callback(self, mqtt_client, mqtt_userdata, mqtt_message):
-        if mqtt_message.topic == self.topic:
-            self.text = mqtt_message.payload
+        self.text = mqtt_message.payload
 
 
-class MQTTBoolDisplay(BoolDisplay):
+class MQTTBoolDisplay(MQTTSubscriber, BoolDisplay):
     def __init__(
         self,
         topic: str,
@@ -89,21 +129,24 @@ class MQTTBoolDisplay(BoolDisplay):
 
     def before_start(self):
         super(MQTTBoolDisplay, self).before_start()
-        current_config.mqtt_client.message_callback_add(self.topic, self.mqtt_callback)
-        current_config.mqtt_client.subscribe(self.topic)
+        current_config.mqtt_subscribe(self.topic, self.mqtt_receive)
+
+    def after_stop(self):
+        current_config.mqtt_unsubscribe(self.topic, self.mqtt_receive)
+        super(MQTTBoolDisplay, self).after_stop()
 
     def mqtt_callback(self, mqtt_client, mqtt_userdata, mqtt_message):
-        if mqtt_message.topic == self.topic:
-            payload = mqtt_message.payload.lower()
+        payload = mqtt_message.payload.lower()
+
+        if payload == b'0' or payload == b'false' or payload == b'no':
+            self.value = False
+        elif payload == b'1' or payload == b'true' or payload == b'yes':
+            self.value = True
+        else:
+            self.value = None
 
-            if payload == b'0' or payload == b'false' or payload == b'no':
-                self.value = False
-            elif payload == b'1' or payload == b'true' or payload == b'yes':
-                self.value = True
-            else:
-                self.value = None
 
-class MQTTButton(Button):
+class MQTTButton(MQTTSubscriber, Button):
     def __init__(
         self,
         mqtt_topic: str,
@@ -137,23 +180,35 @@ class MQTTButton(Button):
 
     def before_start(self):
         super(MQTTButton, self).before_start()
-        current_config.mqtt_client.message_callback_add(self.mqtt_topic, self.mqtt_callback)
-        current_config.mqtt_client.subscribe(self.mqtt_topic)
+        current_config.mqtt_subscribe(self.mqtt_topic, self.mqtt_receive)
+
+    def after_stop(self):
+        current_config.mqtt_unsubscribe(self.mqtt_topic, self.mqtt_receive)
+        super(MQTTButton, self).after_stop()
 
     def mqtt_callback(self, mqtt_client, mqtt_userdata, mqtt_message):
-        if mqtt_message.topic == self.mqtt_topic:
-            # do something?
-            pass
+        # do something?
+        pass
 
     def on_click(self, event):
+        # without MQTT_SERVER, there's no connection to publish on (and
+        # publishing would create a client just to drop the message)
+        if not current_config.mqtt_enabled:
+            logger.warning("not publishing to %r from %r, MQTT_SERVER isn't set", self.mqtt_topic, self)
+            return
+
         current_config.mqtt_client.publish(self.mqtt_topic, self.mqtt_message)
 
-class MQTTPaginator(Paginator):
+class MQTTPaginator(MQTTSubscriber, Paginator):
     def __init__(
         self,
         mqtt_topic: str,
         pages,
         size: tuple = (1, 10),
+        page_cache: int = 0,
+        prerender: bool = True,
+        transition: str = None,
+        transition_duration: float = 0.25,
     ):
         """A pagination widget where the selected page is determined by the
         value of an MQTT topic.
@@ -167,6 +222,10 @@ class MQTTPaginator(Paginator):
             pages,
             size, 
             show_pagination=False,
+            page_cache=page_cache,
+            prerender=prerender,
+            transition=transition,
+            transition_duration=transition_duration,
         )
 
         self.mqtt_topic = mqtt_topic
@@ -176,11 +235,18 @@ class MQTTPaginator(Paginator):
 
     def before_start(self):
         super(MQTTPaginator, self).before_start()
-        current_config.mqtt_client.message_callback_add(self.mqtt_topic, self.mqtt_callback)
-        current_config.mqtt_client.subscribe(self.mqtt_topic)
+        current_config.mqtt_subscribe(self.mqtt_topic, self.mqtt_receive)
+
+    def after_stop(self):
+        current_config.mqtt_unsubscribe(self.mqtt_topic, self.mqtt_receive)
+        super(MQTTPaginator, self).after_stop()
 
     def mqtt_callback(self, mqtt_client, mqtt_userdata, mqtt_message):
-        if mqtt_message.topic == self.mqtt_topic:
-            self.current_page = int(mqtt_message.payload) % len(self.pages)
-            self.page_update()
+        page = int(mqtt_message.payload) % len(self.pages)
+        if page == self.current_page:
+            return
+
+        self.direction = 1 if page > self.current_page else -1
+        self.current_page = page
+        self.page_update()
 
@@ -1,10 +1,14 @@
 from typing import Any
 
 from rendash.config import current_config
+from rendash.scheduler import current_scheduler
 from rendash.plugins import BasePlugin
 from rendash.plugins.basics import TextDisplay, Button
 from rendash.plugins.splits import VerticalSplit, HorizontalSplit
+from rendash.utils.cache import LRUCache
+from rendash.utils.surfaces import surface_pool, surface_bytes
 
+import time
 import pygame
 from pygame import Surface, Rect, Color
 from pygame.font import Font
@@ -13,20 +17,40 @@ from pygame.event import Event
 
 
 class BubbleBase(BasePlugin):
+    tracks_dirty = True
+
     def __init__(self):
         self.inner = TextDisplay('')
 
+    @property
+    def opaque(self):
+        return self.inner.opaque
+
+    def children(self) -> list:
+        return [self.inner]
+
     def render(self, surface: Surface, clock: Clock):
         self.inner.render(surface, clock)
+
+    def render_dirty(self, surface: Surface, clock: Clock, offset: tuple = (0, 0), force: bool = False) -> list:
+        self.update()
+        force = force or self.dirty
+        self.dirty = False
+
+        return self.inner.render_dirty(surface, clock, offset, force)
+
+    def layout(self, rect: Rect):
+        yield (self, rect, False)
+        yield from self.inner.layout(rect)
     
     def on_event(self, event: Event):
         self.inner.on_event(event)
     
     def before_start(self):
-        self.inner.before_start()
+        self.inner.start()
 
     def after_stop(self):
-        self.inner.after_stop()
+        self.inner.stop()
 
 
 class PageNavigation(BubbleBase):
@@ -52,11 +76,136 @@ class PageNavigation(BubbleBase):
 
     def page_prev(self):
         self.paginator.page_prev()
-        self.page_update()
 
     def page_next(self):
         self.paginator.page_next()
-        self.page_update()
+
+
+class PageView(BasePlugin):
+    # every pixel is blitted from the page surface
+    opaque = True
+    tracks_dirty = True
+
+    def __init__(self, paginator):
+        """Draws the current page of a caching ``Paginator``.
+
+        The page is rendered into a surface of its own, and only the parts
+        of that which were redrawn are copied to the screen. When the page
+        is switched, the old page's surface goes into the paginator's page
+        cache, so switching back only redraws what changed in the meantime,
+        and transitions are drawn from the two surfaces rather than by
+        rendering both pages.
+        """
+
+        self.paginator = paginator
+        self.page = None
+        self.surface = None
+        self.size = None
+        self.clock = None
+
+        self.previous = None
+        self.direction = 1
+        self.transition_start = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} page={repr(self.page)}>"
+
+    def children(self) -> list:
+        return [] if self.page is None else [self.page]
+
+    def show(self, page, direction: int = 1):
+        """Switch to `page`, sliding in from the right if `direction` is 1,
+        or from the left if it is -1."""
+
+        if page is self.page:
+            return
+
+        if self.page is not None and self.surface is not None:
+            self.paginator.page_surfaces.put(self.page, self.surface)
+            if self.paginator.transition is not None:
+                self.previous = self.surface
+                self.direction = direction
+                self.transition_start = time.time()
+
+        self.page = page
+        self.surface = None if page is None else self.paginator.page_surfaces.pop(page)
+        self.mark_dirty()
+
+    def render_page(self, page, surface: Surface, size: tuple) -> tuple:
+        """Bring `page`'s `surface` (which may be None) up to date, creating
+        a new one if need be. Returns a `tuple[Surface, list[Rect]]` of the
+        surface, and the areas of it that were redrawn."""
+
+        if surface is None or surface.get_size() != size:
+            if surface is not None:
+                surface_pool.release(surface)
+
+            surface = surface_pool.acquire(size)
+            return (surface, page.render_dirty(surface, self.clock, (0, 0), True))
+
+        return (surface, page.render_dirty(surface, self.clock, (0, 0), False))
+
+    def _draw_transition(self, surface: Surface) -> bool:
+        """Draw the current frame of the transition to `surface`. Returns
+        False once the transition has finished."""
+
+        progress = (time.time() - self.transition_start) / self.paginator.transition_duration
+        if progress >= 1 or self.previous.get_size() != self.surface.get_size():
+            self.previous = None
+            return False
+
+        if self.paginator.transition == "slide":
+            shift = int(surface.get_width() * progress) * self.direction
+            surface.blit(self.previous, (-shift, 0))
+            surface.blit(self.surface, ((surface.get_width() * self.direction) - shift, 0))
+
+        else:
+            surface.blit(self.previous, (0, 0))
+            self.surface.set_alpha(int(255 * progress))
+            surface.blit(self.surface, (0, 0))
+            self.surface.set_alpha(None)
+
+        current_scheduler.wake_in(1 / current_config.framerate)
+        return True
+
+    def render(self, surface: Surface, clock: Clock):
+        self.render_dirty(surface, clock, force=True)
+
+    def render_dirty(self, surface: Surface, clock: Clock, offset: tuple = (0, 0), force: bool = False) -> list:
+        self.update()
+        force = force or self.dirty
+        self.dirty = False
+
+        self.clock = clock
+        self.size = surface.get_size()
+        if self.page is None:
+            if not force:
+                return []
+
+            surface.fill(current_config.color_bg)
+            return [Rect(offset, self.size)]
+
+        (self.surface, rects) = self.render_page(self.page, self.surface, self.size)
+
+        if self.previous is not None:
+            if self._draw_transition(surface):
+                return [Rect(offset, self.size)]
+
+            # the transition has just finished
+            force = True
+
+        if force:
+            surface.blit(self.surface, (0, 0))
+            return [Rect(offset, self.size)]
+
+        for rect in rects:
+            surface.blit(self.surface, rect.topleft, rect)
+
+        return [rect.move(offset) for rect in rects]
+
+    def on_event(self, event: Event):
+        if self.page is not None:
+            self.page.on_event(event)
 
 
 class Paginator(BubbleBase):
@@ -65,30 +214,146 @@ class Paginator(BubbleBase):
         pages,
         size: tuple = (1, 10),
         show_pagination: bool = True,
+        page_cache: int = 0,
+        prerender: bool = True,
+        auto_rotate: float = None,
+        transition: str = None,
+        transition_duration: float = 0.25,
     ):
+        """Displays one of `pages` at a time.
+
+        Pages are only started the first time they are displayed. Pages that
+        have been switched away from are paused (see
+        ``rendash.plugins.BasePlugin.pause``) until they are shown again.
+
+        If `page_cache` is non-zero, the pages are drawn through a
+        ``PageView``, and up to `page_cache` bytes of the surfaces of
+        recently shown pages are kept, so switching back to a page only
+        redraws what has changed on it. If `prerender` is also True, the
+        next page is rendered ahead of time whenever the dashboard is idle.
+
+        If `auto_rotate` is given, the next page is shown every
+        `auto_rotate` seconds.
+
+        `transition` may be ``"slide"`` or ``"crossfade"``, to animate page
+        switches over `transition_duration` seconds. Transitions use the
+        page surfaces, so setting one also enables the page cache (although
+        with a `page_cache` of 0, only one other page is kept).
+        """
+
+        if transition not in (None, "slide", "crossfade"):
+            raise ValueError(f"unknown page transition {repr(transition)}")
+
         self.size = size
         self.show_pagination = show_pagination
         self.current_page = 0
         self.pages = pages
+        self.shown_page = None
+
+        self.prerender = prerender
+        self.auto_rotate = auto_rotate
+        self.rotate_at = None
+        self.transition = transition
+        self.transition_duration = transition_duration
+        self.direction = 1
+
+        self.page_surfaces = LRUCache(page_cache, sizeof=surface_bytes, on_evict=surface_pool.release)
+        self.page_view = None
+        if page_cache > 0 or transition is not None:
+            self.page_view = PageView(self)
 
         self.inner = VerticalSplit([])
+        self.navigation = None
         if self.show_pagination:
-            self.inner.portions.insert(0, (self.size[0], PageNavigation(self)))
+            self.navigation = PageNavigation(self)
+            self.inner.portions.insert(0, (self.size[0], self.navigation))
+        if self.page_view is not None:
+            self.inner.portions.append((self.size[1], self.page_view))
 
     def __repr__(self):
         return f"<{self.__class__.__name__} current_page={repr(self.current_page)} pages={len(self.pages)}>"
+
+    def children(self) -> list:
+        # the current page is inside `inner`, so don't list it twice
+        shown = [portion for (_, portion) in self.inner.portions]
+        if self.page_view is not None:
+            shown.extend(self.page_view.children())
+
+        return [self.inner] + [page for page in self.pages if page not in shown]
     
     def page_update(self):
-        while len(self.inner.portions) > (1 if self.show_pagination else 0):
-            self.inner.portions.pop()
+        page = self.pages[self.current_page]
+
+        if self.page_view is not None:
+            # only the page view needs redrawing
+            self.page_view.show(page, self.direction)
+
+        else:
+            while len(self.inner.portions) > (1 if self.show_pagination else 0):
+                self.inner.portions.pop()
+
+            self.inner.portions.append((self.size[1], page))
+
+            # the page has changed, so redraw the whole paginator
+            self.mark_dirty()
+
+        if self.navigation is not None:
+            self.navigation.page_update()
+
+        self.page_activate()
 
-        self.inner.portions.append((self.size[1], self.pages[self.current_page]))
+    def page_activate(self):
+        """Pause the page that was previously shown, and start (or resume)
+        the current page, if this paginator is running."""
+
+        if not self.started or self.paused:
+            return
+
+        if self.auto_rotate:
+            self.rotate_at = time.time() + self.auto_rotate
+
+        page = self.pages[self.current_page]
+        if page is self.shown_page:
+            return
+
+        if self.shown_page is not None:
+            self.shown_page.pause()
+
+        self.shown_page = page
+        if not page.started:
+            page.start()
+        if page.paused:
+            page.resume()
+
+        if self.page_view is not None and self.prerender:
+            current_scheduler.when_idle(self.prerender_next)
+
+    def prerender_next(self):
+        """Render the next page into the page cache, so that it can be shown
+        without drawing it from scratch."""
+
+        view = self.page_view
+        if view is None or view.size is None or view.clock is None or not self.started or self.paused:
+            return
+
+        page = self.pages[(self.current_page + 1) % len(self.pages)]
+        if page is view.page:
+            return
+
+        # the page needs to be running to draw it, but not doing anything
+        if not page.started:
+            page.start()
+            page.pause()
+
+        (surface, _) = view.render_page(page, self.page_surfaces.pop(page), view.size)
+        self.page_surfaces.put(page, surface)
 
     def page_prev(self):
         self.current_page -= 1
         if self.current_page < 0:
             self.current_page = len(self.pages) - 1
 
+        self.direction = -1
         self.page_update()
 
     def page_next(self):
@@ -96,19 +361,50 @@ class Paginator(BubbleBase):
         if self.current_page >= len(self.pages):
             self.current_page = 0
 
+        self.direction = 1
         self.page_update()
 
+    def update(self):
+        if self.rotate_at is None or not self.started or self.paused:
+            return
+
+        if time.time() >= self.rotate_at:
+            self.page_next()
+
+        current_scheduler.wake_at(self.rotate_at)
+
+    def pause(self):
+        super(Paginator, self).pause()
+        self.shown_page = None
+
+    def resume(self):
+        # the pages that aren't shown stay paused
+        self.paused = False
+        self.inner.resume()
+        self.page_activate()
+
     def before_start(self):
+        # pages kept running from a previous config (see rendash.reload)
+        # shouldn't carry on updating unless they're shown
+        for (i, page) in enumerate(self.pages):
+            if i != self.current_page and page.started and not page.paused:
+                page.pause()
+
         self.page_update()
         super(Paginator, self).before_start()
 
-        for page in self.pages:
-            page.before_start()
-
     def after_stop(self):
-        while len(self.inner.portions) > (1 if self.show_pagination else 0):
-            self.inner.portions.pop()
+        if self.page_view is not None:
+            self.page_view.show(None)
+            self.page_view.previous = None
+            self.page_surfaces.clear()
+        else:
+            while len(self.inner.portions) > (1 if self.show_pagination else 0):
+                self.inner.portions.pop()
 
         super(Paginator, self).after_stop()
         for page in self.pages:
-            page.after_stop()
+            page.stop()
+
+        self.shown_page = None
+        self.rotate_at = None
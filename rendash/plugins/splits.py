@@ -1,22 +1,108 @@
 from typing import Any
 
 from rendash.config import current_config
+from rendash.layout import current_layout, subtract_rects
 from rendash.plugins import BasePlugin
 
+from bisect import bisect_right
+
+import abc
+
 import pygame
 from pygame import Surface, Rect, Color
 from pygame.font import Font
 from pygame.time import Clock
 from pygame.event import Event
 
-class Splitter(BasePlugin):
+class PortionList(list):
+    def __init__(self, owner, portions = ()):
+        """A list of `(size, plugin)` portions, that invalidates the layout
+        of the owning ``Splitter`` whenever it is modified."""
+
+        super(PortionList, self).__init__(portions)
+        self.owner = owner
+
+    def _changed(self):
+        self.owner.invalidate_layout()
+
+    def __setitem__(self, *args):
+        super(PortionList, self).__setitem__(*args)
+        self._changed()
+
+    def __delitem__(self, *args):
+        super(PortionList, self).__delitem__(*args)
+        self._changed()
+
+    def __iadd__(self, *args):
+        result = super(PortionList, self).__iadd__(*args)
+        self._changed()
+        return result
+
+    def append(self, *args):
+        super(PortionList, self).append(*args)
+        self._changed()
+
+    def extend(self, *args):
+        super(PortionList, self).extend(*args)
+        self._changed()
+
+    def insert(self, *args):
+        super(PortionList, self).insert(*args)
+        self._changed()
+
+    def pop(self, *args):
+        result = super(PortionList, self).pop(*args)
+        self._changed()
+        return result
+
+    def remove(self, *args):
+        super(PortionList, self).remove(*args)
+        self._changed()
+
+    def clear(self):
+        super(PortionList, self).clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super(PortionList, self).sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super(PortionList, self).reverse()
+        self._changed()
+
+
+class Splitter(BasePlugin, metaclass=abc.ABCMeta):
+    # the index into a Rect of the position along the split axis
+    axis = 0
+
+    # we fill the padding between portions, and the portions fill themselves
+    opaque = True
+    tracks_dirty = True
+
     def __init__(self, portions, padding: int = 8):
         self.padding = padding
+        self._layout_key = None
+        self._layout_rects = []
+        self._layout_edges = []
+        self._layout_gutters = []
+        self._layout_surface = None
+        self._layout_subsurfaces = []
+
         self.portions = []
         for portion in portions:
             if not isinstance(portion, tuple):
                 portion = (1, portion,)
             self.portions.append(portion)
+
+    @property
+    def portions(self):
+        return self._portions
+
+    @portions.setter
+    def portions(self, portions):
+        self._portions = PortionList(self, portions)
+        self.invalidate_layout()
     
     def __repr__(self):
         return f"<{self.__class__.__name__} {repr(self.portions)}>"
@@ -33,95 +119,164 @@ class Splitter(BasePlugin):
             
         return portions
 
+    @abc.abstractmethod
+    def _portion_rects(self, width: int, height: int) -> list:
+        """Returns a `list[tuple[BasePlugin, Rect]]` of each portion and the
+        rect containing it, for a surface of the given size.
+        """
+
+    def children(self) -> list:
+        return [portion for (_, portion) in self.portions]
+
+    def invalidate_layout(self):
+        """Forget the cached layout, so it is recalculated on next use, and
+        redraw this splitter. Called whenever ``portions`` is modified."""
+
+        self._layout_key = None
+        current_layout.invalidate()
+        self.mark_dirty()
+
+    def _rects(self, width: int, height: int) -> list:
+        """Returns a `list[Rect]` of the rect containing each portion, for a
+        surface of the given size. The layout is only recalculated when the
+        size changes, or after ``invalidate_layout``.
+        """
+
+        key = (width, height)
+        if key != self._layout_key:
+            self._layout_key = key
+            self._layout_rects = [rect for (_, rect) in self._portion_rects(width, height)]
+            self._layout_edges = [rect[self.axis] for rect in self._layout_rects]
+
+            self._layout_gutters = [Rect(0, 0, width, height)]
+            for rect in self._layout_rects:
+                self._layout_gutters = subtract_rects(self._layout_gutters, rect)
+            self._layout_surface = None
+
+        return self._layout_rects
+
+    def _hit(self, pos: tuple):
+        """Returns the index of the portion containing `pos`, or None."""
+
+        rects = self._rects(self._last_surface_width, self._last_surface_height)
+        index = bisect_right(self._layout_edges, pos[self.axis]) - 1
+        if index >= 0 and rects[index].collidepoint(pos):
+            return index
+
+        return None
+
+    def _subsurfaces(self, surface: Surface, force: bool = False) -> list:
+        """Returns a `list[tuple[BasePlugin, Surface, Rect]]` of each portion,
+        a subsurface of `surface` for it to draw directly into, and the rect
+        of that subsurface within `surface`.
+
+        The subsurfaces are reused between frames for as long as `surface`
+        and the layout stay the same, and are recreated on a forced redraw
+        in case the underlying display surface has been reallocated.
+        """
+
+        rects = self._rects(surface.get_width(), surface.get_height())
+        if force or surface is not self._layout_surface:
+            self._layout_surface = surface
+            self._layout_subsurfaces = []
+            for rect in rects:
+                if rect.width == 0 or rect.height == 0:
+                    self._layout_subsurfaces.append(None)
+                else:
+                    self._layout_subsurfaces.append(surface.subsurface(rect))
+
+        return list(zip(
+            (portion for (_, portion) in self.portions),
+            self._layout_subsurfaces,
+            rects,
+        ))
+
     def before_start(self):
         for (_, portion) in self.portions:
-            portion.before_start()
+            portion.start()
 
     def after_stop(self):
         for (_, portion) in self.portions:
-            portion.after_stop()
-
+            portion.stop()
 
-class HorizontalSplit(Splitter):
     def render(self, surface: Surface, clock: Clock):
-        surface.fill(current_config.color_bg)
+        self.render_dirty(surface, clock, force=True)
+
+    def render_dirty(self, surface: Surface, clock: Clock, offset: tuple = (0, 0), force: bool = False) -> list:
+        self.update()
+        force = force or self.dirty
+        self.dirty = False
 
         self._last_surface_width = surface.get_width()
         self._last_surface_height = surface.get_height()
-        portions = self._split(self._last_surface_width)
-        
-        x = self.padding
-        for (size, portion) in portions:
-            # get the rect containing this portion, and a surface to contain it
-            rect = Rect(x, self.padding, size, self._last_surface_height - (self.padding * 2))
-            portion_surface = Surface((rect.width, rect.height))
-            portion_surface.fill(current_config.color_bg)
+        portion_surfaces = self._subsurfaces(surface, force)
 
-            # render the portion
-            portion.render(portion_surface, clock)
+        # only the padding between portions needs filling
+        if force:
+            for rect in self._layout_gutters:
+                surface.fill(current_config.color_bg, rect)
 
-            # and blit that to the screen
-            surface.blit(portion_surface, rect)
-            x += size + (self.padding * 2)
+        rects = []
+        for (portion, portion_surface, rect) in portion_surfaces:
+            if portion_surface is None:
+                continue
+
+            # render the portion straight into our surface
+            portion_offset = (offset[0] + rect.left, offset[1] + rect.top)
+            rects.extend(portion.render_dirty(portion_surface, clock, portion_offset, force))
+
+        if force:
+            return [Rect(offset, surface.get_size())]
+
+        return rects
+
+    def layout(self, rect: Rect):
+        yield (self, rect, False)
+
+        for ((_, portion), portion_rect) in zip(self.portions, self._rects(rect.width, rect.height)):
+            yield from portion.layout(portion_rect.move(rect.left, rect.top))
 
     def on_event(self, event: Event):
+        if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION):
+            index = self._hit(event.pos)
+            if index is not None:
+                rect = self._layout_rects[index]
+                event.pos = (event.pos[0] - rect.left, event.pos[1] - rect.top)
+                self.portions[index][1].on_event(event)
+        else:
+            for (_, portion) in self.portions:
+                portion.on_event(event)
+
+
+class HorizontalSplit(Splitter):
+    axis = 0
+
+    def _portion_rects(self, width: int, height: int) -> list:
         portion_rects = []
-        portions = self._split(self._last_surface_width)
+        bounds = Rect(0, 0, width, height)
 
         x = self.padding
-        for (size, portion) in portions:
+        for (size, portion) in self._split(width):
             # get the rect containing this portion
-            rect = Rect(x, self.padding, size, self._last_surface_height - (self.padding * 2))
+            rect = Rect(x, self.padding, max(size, 0), max(height - (self.padding * 2), 0))
+            portion_rects.append((portion, rect.clip(bounds)))
             x += size + (self.padding * 2)
-            portion_rects.append((portion, rect))
 
-        if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEBUTTONUP:
-            for (portion, rect) in portion_rects:
-                if rect.collidepoint(event.pos):
-                    event.pos = (event.pos[0] - rect.left, event.pos[1] - rect.top)
-                    portion.on_event(event)
-        else:
-            for (portion, _) in portion_rects:
-                portion.on_event(event)
+        return portion_rects
 
-class VerticalSplit(Splitter):
-    def render(self, surface: Surface, clock: Clock):
-        surface.fill(current_config.color_bg)
-
-        self._last_surface_width = surface.get_width()
-        self._last_surface_height = surface.get_height()
-        portions = self._split(self._last_surface_height)
-        
-        y = self.padding
-        for (size, portion) in portions:
-            # get the rect containing this portion, and a surface to contain it
-            rect = Rect(self.padding, y, self._last_surface_width - (self.padding * 2), size)
-            portion_surface = Surface((rect.width, rect.height))
-            portion_surface.fill(current_config.color_bg)
 
-            # render the portion
-            portion.render(portion_surface, clock)
-
-            # and blit that to the screen
-            surface.blit(portion_surface, rect)
-            y += size + (self.padding * 2)
+class VerticalSplit(Splitter):
+    axis = 1
 
-    def on_event(self, event: Event):
+    def _portion_rects(self, width: int, height: int) -> list:
         portion_rects = []
-        portions = self._split(self._last_surface_height)
-        
+        bounds = Rect(0, 0, width, height)
+
         y = self.padding
-        for (size, portion) in portions:
-            # get the rect containing this portion, and a surface to contain it
-            rect = Rect(self.padding, y, self._last_surface_width - (self.padding * 2), size)
+        for (size, portion) in self._split(height):
+            # get the rect containing this portion
+            rect = Rect(self.padding, y, max(width - (self.padding * 2), 0), max(size, 0))
+            portion_rects.append((portion, rect.clip(bounds)))
             y += size + (self.padding * 2)
-            portion_rects.append((portion, rect))
 
-        if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEBUTTONUP:
-            for (portion, rect) in portion_rects:
-                if rect.collidepoint(event.pos):
-                    event.pos = (event.pos[0] - rect.left, event.pos[1] - rect.top)
-                    portion.on_event(event)
-        else:
-            for (portion, _) in portion_rects:
-                portion.on_event(event)
+        return portion_rects
@@ -0,0 +1,221 @@
+from rendash.config import current_config
+from rendash.plugins import walk
+from rendash.utils.fonts import font_registry
+from rendash.utils.text import text_cache
+
+from collections import deque
+
+import os
+import json
+import time
+import threading
+
+from pygame import Surface, Rect, Color
+
+
+# The plugin methods that are timed
+PHASES = (
+    'render_dirty',
+    'update',
+    'on_event',
+    'before_start',
+    'after_stop',
+    'mqtt_receive',
+    'mqtt_callback',
+    'cache_update',
+    'http_parser',
+)
+
+
+class TimedMethod:
+    def __init__(self, profiler, label: str, phase: str, method):
+        """Wraps `method`, recording how long each call takes.
+
+        Compares equal to the wrapped method, so that it can still be used to
+        unsubscribe a callback that was subscribed before it was wrapped.
+        """
+
+        self.profiler = profiler
+        self.label = label
+        self.phase = phase
+        self.method = method
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.label}.{self.phase}>"
+
+    def __eq__(self, other):
+        if isinstance(other, TimedMethod):
+            other = other.method
+
+        return self.method == other
+
+    def __hash__(self):
+        return hash(self.method)
+
+    def __call__(self, *args, **kwargs):
+        profiler = self.profiler
+        if not profiler.enabled:
+            return self.method(*args, **kwargs)
+
+        stack = profiler._stack()
+        stack.append(0)
+        start = time.perf_counter()
+        try:
+            return self.method(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            children = stack.pop()
+            if len(stack) > 0:
+                stack[-1] += duration
+
+            profiler.samples.append((self.label, self.phase, start, duration, duration - children, threading.get_ident()))
+
+
+class Profiler:
+    def __init__(self, capacity: int = 50000, frames: int = 300):
+        """Records per-widget timings into a ring buffer of the last
+        `capacity` calls, and the times of the last `frames` frames.
+
+        Widgets are only instrumented once ``instrument`` is called, and the
+        instrumentation does next to nothing while ``enabled`` is False.
+        """
+
+        self.enabled = False
+        self.overlay = False
+        self.trace_path = None
+        self.samples = deque(maxlen=capacity)
+        self.frame_times = deque(maxlen=frames)
+        self.labels = {}
+        self._local = threading.local()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} enabled={self.enabled} samples={len(self.samples)}>"
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        return stack
+
+    def instrument(self, root):
+        """Wrap the timed methods of `root`, and every plugin it contains.
+
+        Plugins that have already started have subscribed their unwrapped
+        ``mqtt_receive``, so their subscriptions are swapped for the wrapped
+        one, to time MQTT messages being handled.
+        """
+
+        for plugin in walk(root):
+            if id(plugin) in self.labels:
+                continue
+
+            label = self.labels[id(plugin)] = f"{plugin.__class__.__name__}#{len(self.labels)}"
+            for phase in PHASES:
+                method = getattr(plugin, phase, None)
+                if callable(method) and not isinstance(method, TimedMethod):
+                    timed = TimedMethod(self, label, phase, method)
+                    setattr(plugin, phase, timed)
+                    if phase == 'mqtt_receive':
+                        current_config.mqtt_router.replace(method, timed)
+
+    def start(self, root):
+        self.instrument(root)
+        self.enabled = True
+
+    def record_frame(self, start: float, duration: float):
+        if self.enabled:
+            self.frame_times.append(duration)
+            self.samples.append(("frame", "frame", start, duration, duration, threading.get_ident()))
+
+    def hottest(self, count: int = 10, window: float = 5) -> list:
+        """Returns a `list[tuple[str, float]]` of the `count` widgets that
+        spent the most time in their own code (excluding the plugins they
+        contain) over the last `window` seconds, and that time in seconds
+        per frame."""
+
+        since = time.perf_counter() - window
+        totals = {}
+        frames = 0
+        for (label, phase, start, duration, self_time, _) in list(self.samples):
+            if start < since:
+                continue
+
+            if phase == "frame":
+                frames += 1
+            else:
+                totals[label] = totals.get(label, 0) + self_time
+
+        frames = max(frames, 1)
+        hottest = sorted(totals.items(), key=lambda x: x[1], reverse=True)[:count]
+        return [(label, total / frames) for (label, total) in hottest]
+
+    def draw_overlay(self, surface: Surface, font, color_fg: Color, color_bg: Color) -> Rect:
+        """Draw the hottest widgets, and a histogram of recent frame times,
+        to the top left of `surface`. Returns the rect that was drawn to."""
+
+        line_height = font_registry.line_height(font)
+        lines = ["hottest widgets (ms/frame, self)"]
+        for (label, per_frame) in self.hottest():
+            lines.append(f"{per_frame * 1000:8.3f}  {label}")
+
+        # frame time histogram, in 2ms buckets up to 40ms
+        buckets = [0] * 21
+        for duration in self.frame_times:
+            buckets[min(int(duration * 1000 / 2), 20)] += 1
+
+        width = max(text_cache.render(font, line, True, color_fg).get_width() for line in lines) + 16
+        width = max(width, len(buckets) * 8 + 16)
+        histogram_height = 48
+        rect = Rect(0, 0, width, (line_height * (len(lines) + 1)) + histogram_height + 24)
+        rect = rect.clip(surface.get_rect())
+
+        overlay = surface.subsurface(rect)
+        overlay.fill(color_bg)
+
+        y = 8
+        for line in lines:
+            overlay.blit(text_cache.render(font, line, True, color_fg), (8, y))
+            y += line_height
+
+        overlay.blit(text_cache.render(font, "frame times (2ms buckets)", True, color_fg), (8, y))
+        y += line_height + 4
+
+        tallest = max(max(buckets), 1)
+        for (i, count) in enumerate(buckets):
+            height = int((count / tallest) * histogram_height)
+            if height > 0:
+                overlay.fill(color_fg, Rect(8 + (i * 8), y + histogram_height - height, 6, height))
+
+        return rect
+
+    def trace_events(self) -> dict:
+        """Returns the recorded samples in Chrome's trace event format."""
+
+        pid = os.getpid()
+        events = []
+        for (label, phase, start, duration, _, tid) in list(self.samples):
+            events.append({
+                'name': label,
+                'cat': phase,
+                'ph': 'X',
+                'ts': start * 1000000,
+                'dur': duration * 1000000,
+                'pid': pid,
+                'tid': tid,
+            })
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path = None):
+        """Write the recorded samples to `path` (or ``trace_path``) as Chrome
+        trace event JSON."""
+
+        path = path or self.trace_path or "rendash-trace.json"
+        with open(path, 'w') as fh:
+            json.dump(self.trace_events(), fh)
+
+        return path
+
+
+current_profiler = Profiler()
@@ -0,0 +1,410 @@
+from rendash.config import current_config
+from rendash.layout import current_layout
+from rendash.plugins import BasePlugin
+from rendash.plugins.page import Paginator
+from rendash.profiler import current_profiler
+from rendash.scheduler import current_scheduler
+
+from pathlib import Path
+
+import os
+import types
+import select
+import struct
+import logging
+import threading
+import ctypes
+import ctypes.util
+
+import pygame
+
+
+logger = logging.getLogger(__name__)
+
+# from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def inotify_libc():
+    """Returns libc, if it has inotify, or None."""
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+
+    return libc
+
+
+class ConfigWatcher:
+    def __init__(self, path: Path, on_change = None, interval: float = 1.0):
+        """Watches the config file at `path` for changes, from a background
+        thread.
+
+        inotify is used where it's available, watching the directory
+        containing the config (so that editors that save by replacing the
+        file are noticed), otherwise the file's modification time is polled
+        every `interval` seconds. `on_change` is called from the watching
+        thread when a change is noticed, and defaults to waking the main
+        loop. Call ``changed`` from the main loop to find out whether there
+        has been a change since it was last called.
+        """
+
+        self.path = Path(path).absolute()
+        self.on_change = on_change or current_scheduler.wake
+        self.interval = interval
+        self.method = None
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._fd = None
+        self._thread = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} path={repr(str(self.path))} method={repr(self.method)}>"
+
+    def start(self):
+        libc = inotify_libc()
+        if libc is not None:
+            fd = libc.inotify_init1(IN_CLOEXEC)
+            mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+            if fd >= 0 and libc.inotify_add_watch(fd, bytes(self.path.parent), mask) >= 0:
+                self._fd = fd
+            elif fd >= 0:
+                os.close(fd)
+
+        self.method = "poll" if self._fd is None else "inotify"
+        target = self._poll if self._fd is None else self._inotify
+        self._thread = threading.Thread(target=target, name="rendash-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        # closed only once the thread has finished with it, so that it can't
+        # read from another file given the same number
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def changed(self) -> bool:
+        """Returns True if the config has changed since this was last
+        called."""
+
+        if not self._changed.is_set():
+            return False
+
+        self._changed.clear()
+        return True
+
+    def _notify(self):
+        self._changed.set()
+        self.on_change()
+
+    def _inotify(self):
+        name = os.fsencode(self.path.name)
+        fd = self._fd
+
+        while not self._stopped.is_set():
+            # closing the fd doesn't wake a blocked read, so check for being
+            # stopped every `interval` seconds
+            (readable, _, _) = select.select([fd], [], [], self.interval)
+            if not readable:
+                continue
+
+            try:
+                buffer = os.read(fd, 4096)
+            except OSError:
+                return
+
+            offset = 0
+            changed = False
+            while offset < len(buffer):
+                (_, _, _, length) = INOTIFY_EVENT.unpack_from(buffer, offset)
+                offset += INOTIFY_EVENT.size
+                changed = changed or buffer[offset:offset + length].rstrip(b"\0") == name
+                offset += length
+
+            if changed:
+                self._notify()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _poll(self):
+        last = self._stat()
+        while not self._stopped.wait(self.interval):
+            current = self._stat()
+            if current != last:
+                last = current
+                self._notify()
+
+
+def code_key(code: types.CodeType) -> tuple:
+    # unlike comparing code objects, this ignores where in the file the
+    # code is, so that editing the config above a function doesn't change it
+    consts = tuple(code_key(const) if isinstance(const, types.CodeType) else const for const in code.co_consts)
+    return (code.co_name, code.co_code, consts, code.co_names)
+
+
+def structural_key(value, memo: dict = None):
+    """Returns a hashable key describing how `value` was built, such that two
+    plugins built from the same arguments (including plugins built from the
+    same arguments, recursively) have equal keys.
+
+    Functions are compared by their code, so that lambdas in a reloaded
+    config match the lambdas they replace. Anything else that can't be
+    compared by value is compared by identity.
+    """
+
+    if memo is None:
+        memo = {}
+
+    if id(value) in memo:
+        return memo[id(value)]
+
+    # guard against plugins that are (indirectly) their own arguments
+    memo[id(value)] = ('cycle', id(value))
+
+    if isinstance(value, BasePlugin):
+        (args, kwargs) = getattr(value, 'init_args', ((), {}))
+        key = (
+            'plugin',
+            value.__class__.__module__,
+            value.__class__.__qualname__,
+            structural_key(args, memo),
+            structural_key(kwargs, memo),
+        )
+
+    elif isinstance(value, (list, tuple)):
+        key = (value.__class__.__name__, tuple(structural_key(item, memo) for item in value))
+
+    elif isinstance(value, dict):
+        key = ('dict', tuple((structural_key(k, memo), structural_key(v, memo)) for (k, v) in value.items()))
+
+    elif isinstance(value, types.FunctionType):
+        closure = tuple(structural_key(cell.cell_contents, memo) for cell in (value.__closure__ or ()))
+        key = ('function', value.__qualname__, code_key(value.__code__), structural_key(value.__defaults__, memo), closure)
+
+    elif isinstance(value, types.MethodType):
+        key = ('method', structural_key(value.__func__, memo), structural_key(value.__self__, memo))
+
+    elif isinstance(value, pygame.Color):
+        key = ('color', tuple(value))
+
+    else:
+        try:
+            hash(value)
+            key = ('value', value.__class__, value)
+        except TypeError:
+            key = ('object', id(value))
+
+    memo[id(value)] = key
+    return key
+
+
+def config_plugins(value, found: list = None, seen: set = None) -> list:
+    """Returns a `list[BasePlugin]` of every plugin in `value` and the
+    arguments it was built from (recursively), which are the plugins that
+    were built by the config, rather than by other plugins."""
+
+    if found is None:
+        (found, seen) = ([], set())
+
+    if id(value) in seen:
+        return found
+
+    seen.add(id(value))
+    if isinstance(value, BasePlugin):
+        found.append(value)
+        (args, kwargs) = getattr(value, 'init_args', ((), {}))
+        config_plugins(args, found, seen)
+        config_plugins(kwargs, found, seen)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            config_plugins(item, found, seen)
+    elif isinstance(value, dict):
+        for item in value.values():
+            config_plugins(item, found, seen)
+
+    return found
+
+
+def hidden_pages(root: BasePlugin) -> dict:
+    """Returns a dict of the id of every plugin under `root` that is on a
+    page a ``Paginator`` isn't showing, to that page (the outermost one, if
+    paginators are nested)."""
+
+    hidden = {}
+    stack = [(root, None)]
+    seen = set()
+    while len(stack) > 0:
+        (plugin, page) = stack.pop()
+        if id(plugin) in seen:
+            continue
+
+        seen.add(id(plugin))
+        if page is not None:
+            hidden[id(plugin)] = page
+
+        shown = None
+        if isinstance(plugin, Paginator):
+            shown = plugin.pages[plugin.current_page]
+
+        for child in plugin.children():
+            if page is None and isinstance(plugin, Paginator) and child in plugin.pages and child is not shown:
+                stack.append((child, child))
+            else:
+                stack.append((child, page))
+
+    return hidden
+
+
+class TreeDiff:
+    def __init__(self, old_root: BasePlugin):
+        """Reconciles a freshly built plugin tree against the running tree
+        under `old_root`.
+
+        Any plugin in the new tree with the same ``structural_key`` as one in
+        the old tree is replaced with the old one, which keeps its caches,
+        subscriptions, and whatever else it set up in ``before_start``.
+        Plugins whose arguments contain a changed plugin are rebuilt with the
+        reused plugins in place of their fresh copies.
+        """
+
+        self.old_root = old_root
+        self.available = {}
+        self.reused = []
+
+        memo = {}
+        for plugin in config_plugins(old_root):
+            self.available.setdefault(structural_key(plugin, memo), []).append(plugin)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} reused={len(self.reused)}>"
+
+    def reconcile(self, value, memo: dict = None):
+        """Returns `value`, with every plugin in it replaced by the old
+        plugin it matches, if any."""
+
+        if memo is None:
+            memo = {}
+
+        if isinstance(value, BasePlugin):
+            candidates = self.available.get(structural_key(value, memo))
+            if candidates:
+                plugin = candidates.pop()
+                self.reused.append(plugin)
+                return plugin
+
+            (args, kwargs) = getattr(value, 'init_args', ((), {}))
+            new_args = self.reconcile(args, memo)
+            new_kwargs = self.reconcile(kwargs, memo)
+            if all(a is b for (a, b) in zip(new_args, args)) and all(new_kwargs[k] is kwargs[k] for k in kwargs):
+                return value
+
+            # rebuild this plugin around the plugins we've kept
+            return value.__class__(*new_args, **new_kwargs)
+
+        elif isinstance(value, list):
+            return [self.reconcile(item, memo) for item in value]
+
+        elif isinstance(value, tuple) and value.__class__ is tuple:
+            return tuple(self.reconcile(item, memo) for item in value)
+
+        elif isinstance(value, dict):
+            return {k: self.reconcile(v, memo) for (k, v) in value.items()}
+
+        return value
+
+    def apply(self, new_root: BasePlugin) -> BasePlugin:
+        """Swap the running tree for `new_root`, stopping the plugins that
+        have been removed, and starting the ones that have been added.
+        Returns the reconciled root, which should replace `new_root`."""
+
+        new_root = self.reconcile(new_root)
+        if new_root is self.old_root:
+            return new_root
+
+        # stop the old tree, without stopping the plugins we're keeping
+        for plugin in self.reused:
+            plugin.started = False
+
+        self.old_root.stop()
+
+        for plugin in self.reused:
+            plugin.started = True
+
+        new_root.start()
+
+        # plugins that were paused (such as on a page that wasn't shown) and
+        # have moved somewhere they're shown won't be resumed by anything
+        # else. Those on a page that's paused are resumed along with it.
+        hidden = hidden_pages(new_root)
+        for plugin in self.reused:
+            page = hidden.get(id(plugin))
+            if plugin.paused and (page is None or not page.paused):
+                plugin.resume()
+
+        return new_root
+
+
+def settings_key(raw_values: dict):
+    """Returns a key for the config settings other than ``ROOT_OBJECT``."""
+
+    return structural_key({k: v for (k, v) in raw_values.items() if k.isupper() and k != 'ROOT_OBJECT'})
+
+
+def reload_config(path: Path) -> bool:
+    """Re-read the config file at `path`, and swap in its ``ROOT_OBJECT``,
+    keeping every widget that hasn't changed running. Returns False (leaving
+    the running config alone) if the config can't be loaded.
+
+    If any setting other than ``ROOT_OBJECT`` has changed, the whole tree is
+    restarted, as widgets pick up their default fonts and colors when they
+    start. Changes to ``MQTT_SERVER`` and ``FULLSCREEN`` need a restart.
+    """
+
+    try:
+        module = current_config.read_file(path)
+    except Exception:
+        logger.exception("not reloading %s, it failed to load", path)
+        return False
+
+    old_root = current_config.root_object()
+    old_settings = settings_key(current_config.raw_values)
+
+    current_config.load_from_object(module)
+    current_config.apply_settings()
+    new_root = current_config.root_object()
+
+    if settings_key(current_config.raw_values) != old_settings:
+        logger.info("settings in %s changed, restarting every widget", path)
+        old_root.stop()
+        new_root.start()
+    else:
+        diff = TreeDiff(old_root)
+        new_root = diff.apply(new_root)
+        logger.info("reloaded %s, keeping %d widgets", path, len(diff.reused))
+
+    current_config.raw_values['ROOT_OBJECT'] = new_root
+
+    if current_profiler.enabled:
+        current_profiler.instrument(new_root)
+
+    current_layout.invalidate()
+    return True
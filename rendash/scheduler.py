@@ -0,0 +1,138 @@
+from collections import deque
+
+import time
+import pygame
+
+
+# Posted to the event queue to wake the main loop from another thread
+WAKE_EVENT = pygame.event.custom_type()
+
+# Events that mean someone is interacting with the dashboard
+INTERACTIVE_EVENTS = (
+    pygame.MOUSEBUTTONDOWN,
+    pygame.MOUSEBUTTONUP,
+    pygame.MOUSEMOTION,
+    pygame.FINGERDOWN,
+    pygame.FINGERUP,
+    pygame.FINGERMOTION,
+    pygame.KEYDOWN,
+)
+
+
+class Scheduler:
+    def __init__(self, interactive_timeout: float = 1.0):
+        """Decides how long the main loop can sleep for between frames.
+
+        Plugins register the next time their output will change with
+        ``wake_at`` (from their ``update`` method, which is called every
+        frame), and other threads can wake the main loop immediately with
+        ``wake``. While the dashboard is being interacted with, and for
+        `interactive_timeout` seconds after, the main loop runs at the
+        configured framerate instead.
+
+        Work that can wait until the main loop has nothing else to do (like
+        rendering something before it is needed) can be queued with
+        ``when_idle``.
+        """
+
+        self.interactive_timeout = interactive_timeout
+        self.interactive_until = 0
+        self.deadline = None
+        self.idle_tasks = deque()
+        self._wake_pending = False
+
+    def begin_frame(self):
+        """Forget the deadlines registered during the last frame."""
+
+        self.deadline = None
+
+    def wake_at(self, when: float):
+        """Make sure the main loop wakes up by `when` (a ``time.time()``
+        timestamp)."""
+
+        if self.deadline is None or when < self.deadline:
+            self.deadline = when
+
+    def wake_in(self, seconds: float):
+        """Make sure the main loop wakes up within `seconds`."""
+
+        self.wake_at(time.time() + seconds)
+
+    def wake(self):
+        """Wake the main loop as soon as possible. Safe to call from any
+        thread."""
+
+        if self._wake_pending:
+            return
+
+        self._wake_pending = True
+        try:
+            pygame.event.post(pygame.event.Event(WAKE_EVENT))
+        except pygame.error:
+            # the display isn't up yet, so there's nothing to wake
+            self._wake_pending = False
+
+    def when_idle(self, task):
+        """Call `task` the next time the main loop is idle. A task that is
+        already waiting isn't queued twice."""
+
+        if task not in self.idle_tasks:
+            self.idle_tasks.append(task)
+
+    def run_idle(self, budget: float = 0.01):
+        """Run waiting idle tasks, until `budget` seconds have been spent,
+        the next deadline is due, or an event arrives. Nothing is run while
+        the dashboard is being interacted with."""
+
+        started = time.perf_counter()
+        while len(self.idle_tasks) > 0 and not self.interactive:
+            timeout = self.timeout()
+            if (timeout is not None and timeout <= 0) or pygame.event.peek():
+                break
+
+            self.idle_tasks.popleft()()
+            if time.perf_counter() - started >= budget:
+                break
+
+    @property
+    def interactive(self) -> bool:
+        return time.time() < self.interactive_until
+
+    def timeout(self):
+        """Returns how long (in seconds) the main loop may block for, or None
+        if it may block until the next event."""
+
+        if self.interactive:
+            return 0
+
+        if self.deadline is None:
+            return None
+
+        return max(self.deadline - time.time(), 0)
+
+    def wait(self) -> list:
+        """Block until the next deadline, or until an event arrives, and
+        return the pending events."""
+
+        events = []
+        timeout = self.timeout()
+        if timeout is None:
+            events.append(pygame.event.wait())
+        elif timeout > 0:
+            # pygame.event.wait treats a timeout of 0 as "forever"
+            event = pygame.event.wait(max(int(timeout * 1000), 1))
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+
+        events.extend(pygame.event.get())
+
+        for event in events:
+            if event.type == WAKE_EVENT:
+                self._wake_pending = False
+            elif event.type in INTERACTIVE_EVENTS:
+                self.interactive_until = time.time() + self.interactive_timeout
+
+        return events
+
+
+current_scheduler = Scheduler()
@@ -0,0 +1,281 @@
+from rendash.config import current_config
+from rendash.fetch import current_fetcher
+from rendash.main import RenderState, main_loop
+from rendash.scheduler import current_scheduler
+from rendash.stream import (
+    MESSAGE, HELLO, HELLO_SIZE, EVENT, MAX_EVENT_LENGTH,
+    parse_address, message, encode_frame, decode_event,
+)
+
+from pathlib import Path
+
+import os
+import socket
+import logging
+import argparse
+import threading
+
+import pygame
+
+
+logger = logging.getLogger(__name__)
+
+
+def close_socket(sock):
+    # shutting down first wakes any thread blocked in accept or recv on it
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+    sock.close()
+
+
+class StreamClient:
+    def __init__(self, sock, address):
+        """One client connected to a ``FrameServer``."""
+
+        self.sock = sock
+        self.address = address
+        self.needs_full = True
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {repr(self.address)}>"
+
+
+class FrameServer:
+    def __init__(self, address: str, size: tuple):
+        """Accepts ``rendash client`` connections on `address` (see
+        ``rendash.stream.parse_address``), and sends them frames of the
+        given screen `size`.
+
+        Connections are accepted, and input read from them, on background
+        threads; input is posted to the pygame event queue, for the main
+        loop to dispatch like local input. Frames are sent from the main
+        loop, by ``StreamRenderState``.
+
+        Clients aren't authenticated, and their input can press any button
+        on the dashboard, so only listen where every client is trusted.
+        """
+
+        self.address = address
+        self.size = tuple(size)
+        self.clients = []
+        self.frames = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._listener = None
+        self._stopped = threading.Event()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.address} clients={len(self.clients)}>"
+
+    def start(self):
+        (family, sockaddr) = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+
+        self._listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        self._listener.bind(sockaddr)
+        self._listener.listen()
+        threading.Thread(target=self._accept, name="rendash-serve", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        close_socket(self._listener)
+
+        with self._lock:
+            clients = self.clients
+            self.clients = []
+
+        for client in clients:
+            close_socket(client.sock)
+
+        (family, sockaddr) = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+
+    def send_frame(self, screen, rects: list, full: bool):
+        """Send the given `rects` of `screen` (or all of it, if `full` is
+        True) to every client. Clients that have just connected get the
+        whole screen."""
+
+        with self._lock:
+            clients = list(self.clients)
+
+        whole = None
+        delta = None
+        for client in clients:
+            if full or client.needs_full:
+                if whole is None:
+                    whole = encode_frame(screen, [screen.get_rect()])
+
+                payload = whole
+                client.needs_full = False
+            elif len(rects) > 0:
+                if delta is None:
+                    delta = encode_frame(screen, rects)
+
+                payload = delta
+            else:
+                continue
+
+            try:
+                client.sock.sendall(payload)
+            except OSError:
+                self._drop(client)
+                continue
+
+            self.bytes_sent += len(payload)
+
+        if whole is not None or delta is not None:
+            self.frames += 1
+
+    def _drop(self, client: StreamClient):
+        with self._lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+        close_socket(client.sock)
+        logger.info("client %r disconnected", client.address)
+
+    def _accept(self):
+        while not self._stopped.is_set():
+            try:
+                (sock, address) = self._listener.accept()
+            except OSError:
+                return
+
+            if sock.family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            # don't let a stalled client hold up the main loop for long
+            sock.settimeout(5.0)
+
+            client = StreamClient(sock, address or self.address)
+            try:
+                sock.sendall(message(HELLO, HELLO_SIZE.pack(*self.size)))
+            except OSError:
+                sock.close()
+                continue
+
+            with self._lock:
+                self.clients.append(client)
+
+            logger.info("client %r connected", client.address)
+            threading.Thread(target=self._receive, args=(client,), name="rendash-serve-client", daemon=True).start()
+
+            # get the new client its first frame
+            current_scheduler.wake()
+
+    def _read(self, sock, count: int) -> bytes:
+        data = b""
+        while len(data) < count:
+            try:
+                chunk = sock.recv(count - len(data))
+            except socket.timeout:
+                continue
+            except OSError:
+                return None
+
+            if not chunk:
+                return None
+
+            data += chunk
+
+        return data
+
+    def _receive(self, client: StreamClient):
+        while not self._stopped.is_set():
+            header = self._read(client.sock, MESSAGE.size)
+            if header is None:
+                break
+
+            # clients only send events, and those are small, so don't buffer
+            # whatever a misbehaving client claims to be sending
+            (kind, length) = MESSAGE.unpack(header)
+            if kind != EVENT or length > MAX_EVENT_LENGTH:
+                logger.warning("client %r sent an invalid message, disconnecting it", client.address)
+                break
+
+            payload = self._read(client.sock, length)
+            if payload is None:
+                break
+
+            try:
+                event = decode_event(payload)
+            except (ValueError, TypeError, AttributeError):
+                logger.warning("client %r sent an invalid event, ignoring it", client.address)
+                continue
+
+            if event is not None:
+                pygame.event.post(event)
+
+        self._drop(client)
+
+
+class StreamRenderState(RenderState):
+    def __init__(self, server: FrameServer, root = None):
+        """A ``RenderState`` that presents frames by sending them to the
+        clients of `server`, rather than to a display."""
+
+        super(StreamRenderState, self).__init__(root)
+        self.server = server
+
+    def present(self, screen, rects: list, full: bool):
+        self.server.send_frame(screen, rects, full)
+
+
+def serve_argument_parser():
+    parser = argparse.ArgumentParser(prog="rendash serve", description="Render a dashboard without a display, and stream it to `rendash client`s.")
+    parser.add_argument('config', metavar='CONFIG', help='path to configuration file')
+    parser.add_argument('--listen', default='localhost:5900', metavar='ADDRESS', help='where to accept clients, as HOST:PORT (:PORT for every interface) or unix:PATH; clients can press buttons, so only listen where they are trusted (default: %(default)s)')
+    parser.add_argument('--size', default='1280x720', help='screen size, as WIDTHxHEIGHT (default: %(default)s)')
+    return parser
+
+
+def serve_main(argv: list) -> int:
+    from rendash.cli import load_config
+
+    parser = serve_argument_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        size = tuple(int(x) for x in args.size.lower().split('x', 1))
+    except ValueError:
+        parser.error(f"invalid --size {repr(args.size)}")
+
+    # render without a screen
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    pygame.init()
+
+    load_config(Path(args.config))
+    if current_config.mqtt_enabled:
+        current_config.mqtt_connect()
+
+    screen = pygame.display.set_mode(size, 0, 32)
+    clock = pygame.time.Clock()
+
+    server = FrameServer(args.listen, size)
+    server.start()
+    state = StreamRenderState(server)
+
+    root_object = current_config.root_object()
+    root_object.start()
+
+    try:
+        while main_loop(screen, clock, state):
+            pass
+    except KeyboardInterrupt:
+        pass
+
+    root_object.stop()
+    server.stop()
+    current_config.mqtt_disconnect()
+    current_fetcher.shutdown()
+    pygame.quit()
+    return 0
@@ -0,0 +1,139 @@
+import sys
+import time
+
+
+class TimedLoader:
+    def __init__(self, profile, name: str, loader):
+        """Wraps a module `loader`, recording how long the module takes to
+        load. Anything else is passed through to the wrapped loader."""
+
+        self.profile = profile
+        self.name = name
+        self.loader = loader
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name} {repr(self.loader)}>"
+
+    def __getattr__(self, name: str):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        # extension modules do most of their work here
+        return self.profile.timed(self.profile.imports, self.name, self.loader.create_module, spec)
+
+    def exec_module(self, module):
+        return self.profile.timed(self.profile.imports, self.name, self.loader.exec_module, module)
+
+
+class ImportTimer:
+    def __init__(self, profile):
+        """A meta path finder that wraps the loader of every module imported
+        while it is installed with a ``TimedLoader``. It doesn't find any
+        modules itself."""
+
+        self.profile = profile
+
+    def find_spec(self, fullname: str, path, target = None):
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, 'find_spec', None)
+            if finder is self or find_spec is None:
+                continue
+
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = TimedLoader(self.profile, fullname, spec.loader)
+
+            return spec
+
+        return None
+
+
+class StartupProfile:
+    def __init__(self):
+        """Records how long startup takes: how long each module takes to
+        import, and how long each widget's ``before_start`` takes, up to the
+        first frame.
+
+        Times are self times, not counting imports (or widgets started) from
+        within the module (or widget).
+        """
+
+        self.started = time.perf_counter()
+        self.imports = {}
+        self.widgets = {}
+        self.labels = {}
+        self.finder = ImportTimer(self)
+        self._stack = []
+        self._wrapped = []
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} imports={len(self.imports)} widgets={len(self.widgets)}>"
+
+    def timed(self, totals: dict, name: str, function, *args):
+        """Call `function` with `args`, adding the time it took (less the
+        time spent in anything else timed from within it) to `totals`."""
+
+        self._stack.append(0)
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            duration = time.perf_counter() - start
+            children = self._stack.pop()
+            if len(self._stack) > 0:
+                self._stack[-1] += duration
+
+            totals[name] = totals.get(name, 0) + (duration - children)
+
+    def install(self):
+        """Start timing imports."""
+
+        sys.meta_path.insert(0, self.finder)
+
+    def instrument(self, root):
+        """Time the ``before_start`` of `root`, and every plugin it
+        contains."""
+
+        from rendash.plugins import walk
+
+        for plugin in walk(root):
+            label = self.labels[id(plugin)] = f"{plugin.__class__.__name__}#{len(self.labels)}"
+            before_start = plugin.before_start
+            self._wrapped.append((plugin, plugin.__dict__.get('before_start')))
+            plugin.before_start = (lambda label, before_start: lambda: self.timed(self.widgets, label, before_start))(label, before_start)
+
+    def finish(self):
+        """Stop timing imports and widgets."""
+
+        if self.finder in sys.meta_path:
+            sys.meta_path.remove(self.finder)
+
+        # put back whatever was there before (the profiler may have wrapped
+        # it too)
+        for (plugin, before_start) in self._wrapped:
+            if before_start is None:
+                del plugin.before_start
+            else:
+                plugin.before_start = before_start
+
+        self._wrapped = []
+
+    def report(self, count: int = 20) -> str:
+        """Returns the time taken so far, and the `count` slowest imports and
+        widgets, as text."""
+
+        elapsed = time.perf_counter() - self.started
+        lines = [f"startup: {elapsed * 1000:.1f}ms to first frame"]
+
+        lines.append(f"imports: {sum(self.imports.values()) * 1000:.1f}ms in {len(self.imports)} modules (ms, self)")
+        for (name, duration) in sorted(self.imports.items(), key=lambda x: x[1], reverse=True)[:count]:
+            lines.append(f"{duration * 1000:10.2f}  {name}")
+
+        lines.append(f"before_start: {sum(self.widgets.values()) * 1000:.1f}ms in {len(self.widgets)} widgets (ms, self)")
+        for (label, duration) in sorted(self.widgets.items(), key=lambda x: x[1], reverse=True)[:count]:
+            lines.append(f"{duration * 1000:10.2f}  {label}")
+
+        return "\n".join(lines)
@@ -0,0 +1,255 @@
+"""The protocol for streaming frames from ``rendash serve`` to ``rendash
+client``, and the client itself.
+
+Everything is sent as messages of a 1 byte type and a 4 byte length,
+followed by that many bytes of payload:
+
+* ``HELLO`` (server to client): the screen's width and height;
+* ``FRAME`` (server to client): the rects that have changed since the last
+  frame, and their pixels, each either a solid fill, zlib compressed RGB,
+  or raw RGB (whichever is smallest);
+* ``EVENT`` (client to server): a pointer event, as JSON.
+
+So the amount sent, and the work the client does, depends on how much of
+the screen changes, not on its size or the framerate.
+
+This module is deliberately light: the client only needs pygame.
+"""
+
+import json
+import zlib
+import struct
+import select
+import socket
+import argparse
+
+import pygame
+
+
+MESSAGE = struct.Struct("!BI")
+HELLO = 1
+FRAME = 2
+EVENT = 3
+
+HELLO_SIZE = struct.Struct("!HH")
+FRAME_RECTS = struct.Struct("!H")
+FRAME_RECT = struct.Struct("!HHHHBI")
+
+ENCODING_RAW = 0
+ENCODING_ZLIB = 1
+ENCODING_FILL = 2
+
+# The longest ``EVENT`` the server will accept, in bytes
+MAX_EVENT_LENGTH = 1024
+
+# The events sent back from the client, and their attributes
+REMOTE_EVENTS = {
+    'MOUSEBUTTONDOWN': (pygame.MOUSEBUTTONDOWN, ('pos', 'button')),
+    'MOUSEBUTTONUP': (pygame.MOUSEBUTTONUP, ('pos', 'button')),
+    'MOUSEMOTION': (pygame.MOUSEMOTION, ('pos', 'rel', 'buttons')),
+}
+
+
+def parse_address(address: str) -> tuple:
+    """Returns the `tuple[int, Any]` socket family and address for
+    `address`, which is either ``unix:PATH``, or ``HOST:PORT`` (where
+    ``HOST`` may be empty, meaning all interfaces for a server, and the
+    local host for a client)."""
+
+    if address.startswith("unix:"):
+        return (socket.AF_UNIX, address[len("unix:"):])
+
+    (host, _, port) = address.rpartition(':')
+    return (socket.AF_INET, (host.strip("[]"), int(port)))
+
+
+def message(kind: int, payload: bytes) -> bytes:
+    return MESSAGE.pack(kind, len(payload)) + payload
+
+
+def encode_rect(surface, rect) -> bytes:
+    """Returns the encoded pixels of `rect` of `surface`, for a ``FRAME``."""
+
+    pixels = pygame.image.tostring(surface.subsurface(rect), 'RGB')
+    count = rect.width * rect.height
+
+    # a rect that's all one colour (like most background) is just the colour
+    if count > 0 and pixels.count(pixels[:3]) == count:
+        (encoding, data) = (ENCODING_FILL, pixels[:3])
+    else:
+        compressed = zlib.compress(pixels, 1)
+        if len(compressed) < len(pixels):
+            (encoding, data) = (ENCODING_ZLIB, compressed)
+        else:
+            (encoding, data) = (ENCODING_RAW, pixels)
+
+    return FRAME_RECT.pack(rect.left, rect.top, rect.width, rect.height, encoding, len(data)) + data
+
+
+def encode_frame(surface, rects: list) -> bytes:
+    """Returns a ``FRAME`` message of the given `rects` of `surface`."""
+
+    bounds = surface.get_rect()
+    rects = [rect.clip(bounds) for rect in rects]
+    rects = [rect for rect in rects if rect.width > 0 and rect.height > 0]
+
+    parts = [FRAME_RECTS.pack(len(rects))]
+    parts.extend(encode_rect(surface, rect) for rect in rects)
+    return message(FRAME, b"".join(parts))
+
+
+def decode_frame(surface, payload: bytes) -> list:
+    """Draw the ``FRAME`` message `payload` to `surface`, returning the
+    `list[Rect]` of the areas drawn."""
+
+    (count,) = FRAME_RECTS.unpack_from(payload, 0)
+    offset = FRAME_RECTS.size
+    rects = []
+
+    for _ in range(count):
+        (x, y, width, height, encoding, length) = FRAME_RECT.unpack_from(payload, offset)
+        offset += FRAME_RECT.size
+        data = payload[offset:offset + length]
+        offset += length
+
+        rect = pygame.Rect(x, y, width, height)
+        if encoding == ENCODING_FILL:
+            surface.fill(tuple(data), rect)
+        else:
+            if encoding == ENCODING_ZLIB:
+                data = zlib.decompress(data)
+
+            surface.blit(pygame.image.fromstring(data, (width, height), 'RGB'), rect)
+
+        rects.append(rect)
+
+    return rects
+
+
+def encode_event(event) -> bytes:
+    """Returns an ``EVENT`` message for the pygame `event`, or None if it
+    isn't one that's sent to the server."""
+
+    for (name, (kind, attributes)) in REMOTE_EVENTS.items():
+        if event.type == kind:
+            values = {attribute: getattr(event, attribute) for attribute in attributes}
+            return message(EVENT, json.dumps(dict(values, type=name)).encode('utf-8'))
+
+    return None
+
+
+def event_value(value):
+    # event attributes are all ints, or tuples of ints
+    if isinstance(value, list) and all(isinstance(x, int) for x in value):
+        return tuple(value)
+    elif isinstance(value, int):
+        return value
+
+    raise ValueError(f"invalid event attribute {repr(value)}")
+
+
+def decode_event(payload: bytes):
+    """Returns the pygame event in an ``EVENT`` message, or None if it isn't
+    one that's accepted. Raises ``ValueError`` if it is malformed."""
+
+    values = json.loads(payload.decode('utf-8'))
+    if not isinstance(values, dict):
+        return None
+
+    (kind, attributes) = REMOTE_EVENTS.get(str(values.get('type')), (None, ()))
+    if kind is None:
+        return None
+
+    return pygame.event.Event(kind, {attribute: event_value(values.get(attribute)) for attribute in attributes})
+
+
+class MessageReader:
+    def __init__(self):
+        """Splits a stream of bytes back into messages."""
+
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        """Add `data` to the buffer, returning a `list[tuple[int, bytes]]`
+        of each complete message's type and payload."""
+
+        self.buffer.extend(data)
+        messages = []
+        while len(self.buffer) >= MESSAGE.size:
+            (kind, length) = MESSAGE.unpack_from(self.buffer, 0)
+            end = MESSAGE.size + length
+            if len(self.buffer) < end:
+                break
+
+            messages.append((kind, bytes(self.buffer[MESSAGE.size:end])))
+            del self.buffer[:end]
+
+        return messages
+
+
+def run_client(address: str, fullscreen: bool = False) -> int:
+    """Connect to the ``rendash serve`` at `address`, and show what it
+    draws until the window is closed (or Q is pressed)."""
+
+    (family, sockaddr) = parse_address(address)
+    if family == socket.AF_INET and sockaddr[0] == "":
+        sockaddr = ("localhost", sockaddr[1])
+
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(sockaddr)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    pygame.init()
+    pygame.display.set_caption(f"rendash {address}")
+    flags = pygame.FULLSCREEN if fullscreen else 0
+    screen = None
+    reader = MessageReader()
+
+    while True:
+        # wait for frames, but keep the window responsive
+        (readable, _, _) = select.select([sock], [], [], 0.05)
+        if readable:
+            data = sock.recv(65536)
+            if not data:
+                break
+
+            rects = []
+            for (kind, payload) in reader.feed(data):
+                if kind == HELLO:
+                    screen = pygame.display.set_mode(HELLO_SIZE.unpack(payload), flags, 32)
+                elif kind == FRAME and screen is not None:
+                    rects.extend(decode_frame(screen, payload))
+
+            if len(rects) > 0:
+                pygame.display.update(rects)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_q):
+                sock.close()
+                pygame.quit()
+                return 0
+
+            # only send the pointer moving while a button is held
+            if event.type == pygame.MOUSEMOTION and not any(event.buttons):
+                continue
+
+            encoded = encode_event(event)
+            if encoded is not None:
+                sock.sendall(encoded)
+
+    sock.close()
+    pygame.quit()
+    return 0
+
+
+def client_argument_parser():
+    parser = argparse.ArgumentParser(prog="rendash client", description="Show a dashboard streamed by `rendash serve`.")
+    parser.add_argument('address', metavar='ADDRESS', help='the server to connect to, as HOST:PORT or unix:PATH')
+    parser.add_argument('--fullscreen', action='store_true', help='show the dashboard full screen')
+    return parser
+
+
+def client_main(argv: list) -> int:
+    args = client_argument_parser().parse_args(argv)
+    return run_client(args.address, args.fullscreen)
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, max_size: int, sizeof = None, on_evict = None):
+        """A least-recently-used cache, bounded to `max_size`.
+
+        The size of each value is given by the `sizeof` callable, which
+        defaults to counting every value as 1 (so `max_size` is the maximum
+        number of entries). If given, `on_evict` is called with each value
+        evicted to make room for another, and with every value on ``clear``.
+
+        The ``hits`` and ``misses`` attributes count lookups since the cache
+        was created (or since ``clear`` was last called).
+        """
+
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda _: 1)
+        self.on_evict = on_evict
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} entries={len(self._entries)} size={self.size}/{self.max_size} hits={self.hits} misses={self.misses}>"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default = None):
+        """Returns the value for `key`, marking it as recently used, or
+        `default` if it isn't cached."""
+
+        try:
+            (value, _) = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Cache `value` under `key`, evicting the least recently used
+        entries until the cache fits within ``max_size``."""
+
+        self.pop(key)
+
+        size = self.sizeof(value)
+        self._entries[key] = (value, size)
+        self.size += size
+
+        while self.size > self.max_size and len(self._entries) > 1:
+            (_, (evicted, evicted_size)) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            if self.on_evict is not None:
+                self.on_evict(evicted)
+
+        return value
+
+    def pop(self, key, default = None):
+        try:
+            (value, size) = self._entries.pop(key)
+        except KeyError:
+            return default
+
+        self.size -= size
+        return value
+
+    def clear(self):
+        if self.on_evict is not None:
+            for (value, _) in self._entries.values():
+                self.on_evict(value)
+
+        self._entries.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'size': self.size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
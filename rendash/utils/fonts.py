@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pygame
+from pygame.font import Font
+
+
+class FontRegistry:
+    def __init__(self):
+        """A process-wide store of loaded fonts.
+
+        Face names are resolved to files once, each font is only loaded once
+        per (path, size, style), and commonly used metrics are computed once
+        per font.
+        """
+
+        self._paths = {}
+        self._fonts = {}
+        self._line_heights = {}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} fonts={len(self._fonts)}>"
+
+    def resolve(self, face: str, bold: bool = False, italic: bool = False):
+        """Returns the path of the font file for `face`, which is either a
+        path to a font file, or a (comma-separated list of) system font
+        name(s). Returns None if no matching font is found, which pygame
+        treats as its default font.
+        """
+
+        key = (face, bold, italic)
+        if key not in self._paths:
+            if face is None:
+                path = None
+            elif Path(face).is_file():
+                path = str(face)
+            else:
+                path = pygame.font.match_font(face, bold, italic)
+
+            self._paths[key] = path
+
+        return self._paths[key]
+
+    def get(self, face: str, size: int, bold: bool = False, italic: bool = False) -> Font:
+        """Returns the font for `face` at `size`, loading it if needed."""
+
+        path = self.resolve(face, bold, italic)
+        key = (path, size, bold, italic)
+
+        font = self._fonts.get(key)
+        if font is None:
+            font = Font(path, size)
+
+            # like SysFont, fake the style if there's no separate face for it
+            if bold and path == self.resolve(face):
+                font.set_bold(True)
+            if italic and path == self.resolve(face):
+                font.set_italic(True)
+
+            self._fonts[key] = font
+
+        return font
+
+    def line_height(self, font: Font) -> int:
+        """Returns the height of a line of text in `font`."""
+
+        height = self._line_heights.get(font)
+        if height is None:
+            height = self._line_heights[font] = font.size("Tg")[1]
+
+        return height
+
+    def clear(self):
+        self._paths.clear()
+        self._fonts.clear()
+        self._line_heights.clear()
+
+
+font_registry = FontRegistry()
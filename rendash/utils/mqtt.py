@@ -0,0 +1,256 @@
+import logging
+import threading
+
+from rendash.utils import AttrDict
+
+
+logger = logging.getLogger(__name__)
+
+
+class TopicTrie:
+    def __init__(self):
+        """A trie of MQTT topic filters (which may contain ``+`` and ``#``
+        wildcards), for finding every value registered against a filter that
+        matches a given topic in a single pass."""
+
+        self.children = {}
+        self.values = []
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} children={list(self.children.keys())} values={len(self.values)}>"
+
+    def add(self, topic_filter: str, value):
+        node = self
+        for level in topic_filter.split('/'):
+            node = node.children.setdefault(level, TopicTrie())
+
+        node.values.append(value)
+
+    def remove(self, topic_filter: str, value):
+        path = [self]
+        for level in topic_filter.split('/'):
+            node = path[-1].children.get(level)
+            if node is None:
+                return
+
+            path.append(node)
+
+        if value in path[-1].values:
+            path[-1].values.remove(value)
+
+        # prune any nodes that are now empty
+        levels = topic_filter.split('/')
+        for (i, level) in reversed(list(enumerate(levels))):
+            node = path[i + 1]
+            if len(node.values) > 0 or len(node.children) > 0:
+                break
+
+            del path[i].children[level]
+
+    def match(self, topic: str) -> list:
+        """Returns every value registered against a filter matching
+        `topic`."""
+
+        matches = []
+        levels = topic.split('/')
+
+        # as per the MQTT spec, wildcards don't match topics beginning with $
+        self._match(levels, 0, matches, not topic.startswith('$'))
+        return matches
+
+    def _match(self, levels: list, depth: int, matches: list, wildcards: bool):
+        if depth == len(levels):
+            matches.extend(self.values)
+
+            # "a/#" also matches "a"
+            node = self.children.get('#')
+            if node is not None:
+                matches.extend(node.values)
+
+            return
+
+        if wildcards:
+            node = self.children.get('#')
+            if node is not None:
+                matches.extend(node.values)
+
+            node = self.children.get('+')
+            if node is not None:
+                node._match(levels, depth + 1, matches, True)
+
+        node = self.children.get(levels[depth])
+        if node is not None:
+            node._match(levels, depth + 1, matches, True)
+
+
+class MQTTMailbox:
+    def __init__(self):
+        """Hands messages from the MQTT network thread to the render thread,
+        keeping only the latest message for each topic.
+
+        ``stats`` maps each topic to counts of the messages ``received``,
+        ``coalesced`` (replaced by a newer message before being applied), and
+        ``applied``.
+        """
+
+        self.stats = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} pending={len(self._pending)} topics={len(self.stats)}>"
+
+    def put(self, client, userdata, message) -> bool:
+        """Store `message` as the latest for its topic. Returns True if there
+        were no messages waiting before this one."""
+
+        with self._lock:
+            stats = self.stats.get(message.topic)
+            if stats is None:
+                stats = self.stats[message.topic] = AttrDict(received=0, coalesced=0, applied=0)
+
+            stats.received += 1
+            if message.topic in self._pending:
+                stats.coalesced += 1
+
+            first = len(self._pending) == 0
+            self._pending[message.topic] = (client, userdata, message)
+
+        return first
+
+    def drain(self) -> list:
+        """Take every waiting message, returning a `list[tuple]` of the
+        `(client, userdata, message)` for each."""
+
+        with self._lock:
+            (pending, self._pending) = (self._pending, {})
+            for topic in pending.keys():
+                self.stats[topic].applied += 1
+
+        return list(pending.values())
+
+
+class MQTTRouter:
+    def __init__(self, qos: int = 0, on_pending = None):
+        """Routes MQTT messages to the callbacks subscribed to them.
+
+        Each topic filter is subscribed to once, no matter how many
+        callbacks are interested in it. Every subscription is sent in a
+        single SUBSCRIBE when the client connects, and again whenever it
+        reconnects. Incoming messages are matched against every filter in
+        one pass through a ``TopicTrie``.
+
+        Messages arriving on the network thread are held in an
+        ``MQTTMailbox`` (which keeps only the latest message per topic) until
+        ``drain`` is called from the render thread, so callbacks always run
+        on the render thread, at most once per topic per frame. `on_pending`
+        is called (from the network thread) when messages start waiting.
+        """
+
+        self.qos = qos
+        self.on_pending = on_pending
+        self.mailbox = MQTTMailbox()
+        self.client = None
+        self.connected = False
+        self.subscriptions = {}
+        self.trie = TopicTrie()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} connected={self.connected} subscriptions={len(self.subscriptions)}>"
+
+    def attach(self, client):
+        """Start routing the messages received by the paho `client`."""
+
+        self.client = client
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+
+    def subscribe(self, topic_filter: str, callback):
+        """Call `callback` with every message matching `topic_filter`.
+
+        The callback is called with the same arguments as a paho
+        ``on_message`` callback.
+        """
+
+        with self._lock:
+            new = topic_filter not in self.subscriptions
+            self.subscriptions.setdefault(topic_filter, []).append(callback)
+            self.trie.add(topic_filter, callback)
+            send = new and self.connected
+
+        if send:
+            self.client.subscribe(topic_filter, self.qos)
+
+    def unsubscribe(self, topic_filter: str, callback):
+        with self._lock:
+            callbacks = self.subscriptions.get(topic_filter, [])
+            if callback not in callbacks:
+                return
+
+            callbacks.remove(callback)
+            self.trie.remove(topic_filter, callback)
+
+            send = False
+            if len(callbacks) == 0:
+                del self.subscriptions[topic_filter]
+                send = self.connected
+
+        if send:
+            self.client.unsubscribe(topic_filter)
+
+    def replace(self, old, new):
+        """Swap the callback `old` for `new`, wherever `old` is subscribed,
+        without resubscribing. Used to wrap callbacks that are already
+        subscribed, see ``rendash.profiler.Profiler.instrument``."""
+
+        with self._lock:
+            for (topic_filter, callbacks) in self.subscriptions.items():
+                for (i, callback) in enumerate(callbacks):
+                    if callback is not new and callback == old:
+                        callbacks[i] = new
+                        self.trie.remove(topic_filter, callback)
+                        self.trie.add(topic_filter, new)
+
+    def drain(self):
+        """Dispatch every message waiting in the mailbox. Call this from the
+        render thread."""
+
+        for (client, userdata, message) in self.mailbox.drain():
+            self.dispatch(client, userdata, message)
+
+    def dispatch(self, client, userdata, message):
+        """Call every callback subscribed to a filter matching `message`.
+
+        A callback that raises is logged, and doesn't stop the other
+        callbacks (or the render thread) from running.
+        """
+
+        with self._lock:
+            callbacks = self.trie.match(message.topic)
+
+        for callback in callbacks:
+            try:
+                callback(client, userdata, message)
+            except Exception:
+                logger.exception("MQTT callback %r failed on topic %r", callback, message.topic)
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            return
+
+        with self._lock:
+            self.connected = True
+            topics = [(topic_filter, self.qos) for topic_filter in self.subscriptions.keys()]
+
+        if len(topics) > 0:
+            client.subscribe(topics)
+
+    def _on_disconnect(self, client, userdata, rc):
+        with self._lock:
+            self.connected = False
+
+    def _on_message(self, client, userdata, message):
+        if self.mailbox.put(client, userdata, message) and self.on_pending is not None:
+            self.on_pending()
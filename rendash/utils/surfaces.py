@@ -0,0 +1,93 @@
+import pygame
+from pygame import Surface
+
+
+def surface_bytes(surface: Surface) -> int:
+    """Returns the size of the pixel data of `surface`, in bytes."""
+
+    return surface.get_pitch() * surface.get_height()
+
+
+def display_ready() -> bool:
+    """Returns True if there is a display surface to convert surfaces to the
+    format of."""
+
+    return pygame.display.get_init() and pygame.display.get_surface() is not None
+
+
+def display_format(surface: Surface, alpha: bool = False) -> Surface:
+    """Returns `surface` converted to the pixel format of the display (with
+    per-pixel alpha, if `alpha` is True), so that blitting it to the screen
+    doesn't need converting every pixel. Returns `surface` unchanged if
+    there's no display yet."""
+
+    if not display_ready():
+        return surface
+
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+class SurfacePool:
+    def __init__(self):
+        """Hands out offscreen surfaces in the display's pixel format, keyed
+        by size and whether they have per-pixel alpha, reusing surfaces that
+        have been given back with ``release``.
+
+        Call ``clear`` when the display changes (such as when the window is
+        resized); surfaces handed out before then can still be used, but
+        are no longer tracked, and aren't reused once released.
+        """
+
+        self.free = {}
+        self.live = {}
+        self.created = 0
+        self.reused = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} live={len(self.live)} free={sum(map(len, self.free.values()))}>"
+
+    def acquire(self, size: tuple, alpha: bool = False) -> Surface:
+        """Returns a surface of the given `size`, with per-pixel alpha if
+        `alpha` is True. Its contents are undefined."""
+
+        key = (tuple(size), alpha)
+        free = self.free.get(key)
+        if free:
+            surface = free.pop()
+            self.reused += 1
+        else:
+            surface = Surface(size, pygame.SRCALPHA if alpha else 0)
+            surface = display_format(surface, alpha)
+            self.created += 1
+
+        self.live[id(surface)] = (key, surface)
+        return surface
+
+    def release(self, surface: Surface):
+        """Give `surface` back to the pool, to be handed out again. It must
+        not be used after this."""
+
+        entry = self.live.pop(id(surface), None)
+        if entry is None:
+            return
+
+        (key, _) = entry
+        self.free.setdefault(key, []).append(surface)
+
+    def clear(self):
+        self.free = {}
+        self.live = {}
+
+    def stats(self) -> dict:
+        free = [surface for surfaces in self.free.values() for surface in surfaces]
+        return {
+            'live': len(self.live),
+            'live_bytes': sum(surface_bytes(surface) for (_, surface) in self.live.values()),
+            'free': len(free),
+            'free_bytes': sum(surface_bytes(surface) for surface in free),
+            'created': self.created,
+            'reused': self.reused,
+        }
+
+
+surface_pool = SurfacePool()
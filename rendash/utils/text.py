@@ -1,34 +1,217 @@
+from rendash.utils.cache import LRUCache
+from rendash.utils.fonts import font_registry
+from rendash.utils.surfaces import display_format, surface_bytes
+
+from bisect import bisect_left
+import re
+
+import pygame
 from pygame import Surface, Rect, Color
 from pygame.font import Font
 
 
+class TextSurfaceCache(LRUCache):
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        """A cache of rendered lines of text, bounded to `max_bytes` of pixel
+        data.
+
+        Entries are keyed by the text, font, font size, color, and whether
+        the text is antialiased. The returned surfaces are shared, so must
+        not be drawn on. They are converted to the display's pixel format,
+        once there is a display.
+        """
+
+        super(TextSurfaceCache, self).__init__(max_bytes, surface_bytes)
+
+    def render(self, font: Font, text: str, antialias: bool, color: Color) -> Surface:
+        """Equivalent to ``font.render(text, antialias, color)``, returning
+        a cached surface where possible."""
+
+        key = (text, font, font.get_height(), tuple(Color(color)), antialias)
+        surface = self.get(key)
+        if surface is None:
+            surface = self.put(key, display_format(font.render(text, antialias, color), alpha=True))
+
+        return surface
+
+
+text_cache = TextSurfaceCache()
+
+
+class GlyphAtlas:
+    # digits, punctuation, and common units
+    CHARSET = " 0123456789.,:;-+/%()°CFKWVAJhkmMGTbsz"
+
+    def __init__(self, font: Font, color: Color, charset: str = None, antialias: bool = True):
+        """Every character in `charset`, rendered once in the given `font`
+        and `color` into a single atlas surface, so that strings made up of
+        those characters (numbers, mostly) can be drawn by blitting regions
+        of the atlas rather than rendering them with the font.
+
+        Each character is drawn at its own advance width, without kerning,
+        which is how digits are usually laid out anyway.
+        """
+
+        self.font = font
+        self.color = color
+        self.charset = charset or self.CHARSET
+        self.height = font.get_height()
+        self.glyphs = {}
+
+        glyphs = [(char, font.render(char, antialias, color)) for char in self.charset]
+        self.surface = Surface((max(sum(glyph.get_width() for (_, glyph) in glyphs), 1), self.height), pygame.SRCALPHA)
+        self.surface = display_format(self.surface, alpha=True)
+        self.surface.fill((0, 0, 0, 0))
+
+        x = 0
+        for (char, glyph) in glyphs:
+            self.surface.blit(glyph, (x, 0))
+            self.glyphs[char] = (Rect(x, 0, glyph.get_width(), glyph.get_height()), font.size(char)[0])
+            x += glyph.get_width()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} glyphs={len(self.glyphs)}>"
+
+    def supports(self, text: str) -> bool:
+        """Returns True if every character of `text` is in the atlas."""
+
+        glyphs = self.glyphs
+        return all(char in glyphs for char in text)
+
+    def size(self, text: str) -> tuple:
+        return (sum(self.glyphs[char][1] for char in text), self.height)
+
+    def blit(self, surface: Surface, text: str, pos: tuple):
+        """Draw `text` to `surface`, with its top left corner at `pos`."""
+
+        (x, y) = pos
+        for char in text:
+            (area, advance) = self.glyphs[char]
+            surface.blit(self.surface, (x, y), area)
+            x += advance
+
+
+glyph_atlases = LRUCache(64)
+
+
+def glyph_atlas(font: Font, color: Color) -> GlyphAtlas:
+    """Returns the shared ``GlyphAtlas`` for `font` in `color`."""
+
+    key = (font, font.get_height(), tuple(Color(color)))
+    atlas = glyph_atlases.get(key)
+    if atlas is None:
+        atlas = glyph_atlases.put(key, GlyphAtlas(font, color))
+
+    return atlas
+
+
+wrap_cache = LRUCache(1024)
+measure_cache = LRUCache(16384)
+
+
+def _measure(font: Font, text: str) -> int:
+    """Returns the width of `text` in the given `font`, memoized."""
+
+    key = (font, font.get_height(), text)
+    width = measure_cache.get(key)
+    if width is None:
+        width = measure_cache.put(key, font.size(text)[0])
+
+    return width
+
+
+def _split_word(word: str, font: Font, width: int) -> list:
+    """Split a single word that's too long for a line into pieces that fit,
+    using a binary search for each break point."""
+
+    pieces = []
+    while len(word) > 0 and font.size(word)[0] >= width:
+        # find the longest prefix that fits (always taking at least one
+        # character, so we make progress even if nothing fits)
+        lo, hi = 1, len(word)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if font.size(word[:mid])[0] < width:
+                lo = mid
+            else:
+                hi = mid - 1
+
+        pieces.append(word[:lo])
+        word = word[lo:]
+
+    if len(word) > 0:
+        pieces.append(word)
+
+    return pieces
+
+
 def wrap_text(text: str, font: Font, width: int) -> list:
     """Wrap `text` by word, to `width`, using the given `font`.
 
+    Words longer than `width` are broken across lines. The widths of each
+    word are measured once, and break points are found with a binary search
+    over their running total (each line is then measured whole, to make sure
+    it fits), so this is roughly linear in the length of `text`. Results are
+    memoized in ``wrap_cache``.
+
     Returns a `list[str]` of the wrapped lines.
     """
 
+    if isinstance(text, bytes):
+        text = text.decode('utf-8', errors='replace')
+
+    key = (text, font, font.get_height(), width)
+    lines = wrap_cache.get(key)
+    if lines is not None:
+        return list(lines)
+
     lines = []
-    
-    while len(text) > 0:
-        idx = 0
+    if len(text) > 0 and font.size(text)[0] < width:
+        lines.append(text)
 
-        # increment `idx` until we can't fit any more text on this line
-        while font.size(text[:idx])[0] < width and idx < len(text):
-            idx += 1
+    elif len(text) > 0:
+        # split into tokens of a word and its trailing whitespace, breaking
+        # up any words that won't fit on a line by themselves
+        tokens = []
+        for token in re.findall(r"\S+\s*|\s+", text):
+            word = token.rstrip()
+            if len(word) > 0 and _measure(font, word) >= width:
+                pieces = _split_word(word, font, width)
+                pieces[-1] += token[len(word):]
+                tokens.extend(pieces)
+            else:
+                tokens.append(token)
 
-        # if we've wrapped, adjust the wrap to the last word
-        if idx < len(text):
-            idx = text.rfind(" ", 0, idx) + 1
+        # `starts[i]` is where token `i` starts on an infinitely long line,
+        # and `ends[i]` is where the last visible character of it ends
+        starts = []
+        ends = []
+        position = 0
+        for token in tokens:
+            starts.append(position)
+            ends.append(position + _measure(font, token.rstrip()))
+            position += _measure(font, token)
 
-        # store this line and remove it from the original text
-        lines.append(text[:idx])
-        text = text[idx:]
+        i = 0
+        while i < len(tokens):
+            # find the first token that doesn't fit on this line
+            j = bisect_left(ends, starts[i] + width, i)
+            j = max(j, i + 1)
 
-    return lines
+            # the running total is only an estimate of the line's width (it
+            # misses kerning and rounding between tokens), so check the line
+            # itself, dropping tokens until it really fits
+            while j > i + 1 and font.size("".join(tokens[i:j]).rstrip())[0] >= width:
+                j -= 1
 
+            lines.append("".join(tokens[i:j]))
+            i = j
 
-def draw_text(text: str, surface: Surface, rect: Rect, font: Font, color: Color, line_spacing: int = -2, center: bool = True) -> list:
+    wrap_cache.put(key, lines)
+    return list(lines)
+
+
+def draw_text(text: str, surface: Surface, rect: Rect, font: Font, color: Color, line_spacing: int = -2, center: bool = True, atlas: bool = False) -> list:
     """Draw the `text` to the given `surface`, within the bounds of the given
     `rect`, in the given `font` and `color`, line-wrapping the `text` by word.
 
@@ -39,10 +222,13 @@ def draw_text(text: str, surface: Surface, rect: Rect, font: Font, color: Color,
     Returns the lines of text that did not fit within the bounds, or an empty
     list.
 
-    Internally, this uses the ``wrap_text`` function.
+    Internally, this uses the ``wrap_text`` function, and renders lines
+    through ``text_cache``. If `atlas` is True, lines made up entirely of
+    characters in the font's ``GlyphAtlas`` are drawn from that instead,
+    which is faster for text that changes often, like numbers.
     """
 
-    font_height = font.size("Tg")[1]
+    font_height = font_registry.line_height(font)
     if not isinstance(text, list):
         text = wrap_text(text, font, rect.width)
 
@@ -55,16 +241,28 @@ def draw_text(text: str, surface: Surface, rect: Rect, font: Font, color: Color,
     if center:
         y = (rect.height / 2) - (((font_height + line_spacing) * printable_lines) / 2)
 
+    glyphs = glyph_atlas(font, color) if atlas else None
+
     for line in text[:printable_lines]:
-        # render the line
-        image = font.render(line, True, color)
+        if glyphs is not None and glyphs.supports(line):
+            # compose the line from the atlas
+            x = rect.left
+            if center:
+                x = (rect.width / 2) - (glyphs.size(line)[0] / 2)
+
+            glyphs.blit(surface, line, (x, y))
+
+        else:
+            # render the line
+            image = text_cache.render(font, line, True, color)
+
+            x = rect.left
+            if center:
+                x = (rect.width / 2) - (image.get_width() / 2)
 
-        x = rect.left
-        if center:
-            x = (rect.width / 2) - (image.get_width() / 2)
+            # blit the line
+            surface.blit(image, (x, y))
 
-        # blit the line
-        surface.blit(image, (x, y))
         y += font_height + line_spacing
 
     return text[printable_lines:]
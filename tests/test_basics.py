@@ -0,0 +1,41 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from pygame import Surface, Color
+from pygame.time import Clock
+
+from rendash.plugins.basics import TextDisplay
+from rendash.utils.text import glyph_atlases
+
+
+@pytest.fixture
+def font():
+    pygame.font.init()
+    return pygame.font.Font(None, 16)
+
+
+def test_text_display_glyph_atlas(font):
+    display = TextDisplay("21.5", font, Color(0, 0, 0), Color(255, 255, 255), glyph_atlas=True)
+    assert display.glyph_atlas
+
+    display.start()
+    glyph_atlases.clear()
+    rects = display.render_dirty(Surface((100, 40)), Clock())
+
+    assert len(rects) == 1
+    assert len(glyph_atlases) == 1
+
+
+def test_text_display_glyph_atlas_default(font):
+    display = TextDisplay("21.5", font, Color(0, 0, 0), Color(255, 255, 255))
+    assert not display.glyph_atlas
+
+    display.start()
+    glyph_atlases.clear()
+    display.render_dirty(Surface((100, 40)), Clock())
+
+    assert len(glyph_atlases) == 0
@@ -0,0 +1,46 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("pygame")
+
+from rendash.plugins import clock
+from rendash.plugins.clock import WorldClockGrid
+
+
+def frozen_at(monkeypatch, when: str):
+    frozen = datetime.fromisoformat(when).replace(tzinfo=timezone.utc)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return frozen.astimezone(tz)
+
+    monkeypatch.setattr(clock, 'datetime', FrozenDatetime)
+
+
+@pytest.mark.parametrize(('when', 'zone', 'expected'), [
+    # just before New York springs forward, an hour after it would have
+    ("2026-03-08T05:00:00", "America/New_York", ["2026-03-08", "00:00"]),
+    ("2026-03-08T07:30:00", "America/New_York", ["2026-03-08", "03:30"]),
+    # just after Sydney falls back
+    ("2026-04-04T16:30:00", "Australia/Sydney", ["2026-04-05", "02:30"]),
+])
+def test_world_clock_grid_across_dst(monkeypatch, when, zone, expected):
+    frozen_at(monkeypatch, when)
+    grid = WorldClockGrid([zone, "UTC"])
+
+    assert grid._clock_text()[0] == expected
+
+
+def test_world_clock_grid_shares_text_by_offset(monkeypatch):
+    frozen_at(monkeypatch, "2026-07-01T12:00:00")
+    grid = WorldClockGrid(["Europe/London", "Europe/Lisbon", "UTC"])
+
+    texts = grid._clock_text()
+    assert texts[0] is texts[1]
+    assert texts[0] == ["2026-07-01", "13:00"]
+    assert texts[2] == ["2026-07-01", "12:00"]
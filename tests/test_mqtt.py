@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("pygame")
+
+from types import SimpleNamespace
+
+from rendash.utils.mqtt import MQTTRouter
+
+
+def test_dispatch_survives_failing_callback():
+    router = MQTTRouter()
+    received = []
+
+    # like MQTTPaginator given a payload that isn't a number
+    router.subscribe('sensors/#', lambda client, userdata, message: int(message.payload))
+    router.subscribe('sensors/#', lambda client, userdata, message: received.append(message.payload))
+
+    router.mailbox.put(None, None, SimpleNamespace(topic='sensors/a', payload=b"not a number"))
+    router.mailbox.put(None, None, SimpleNamespace(topic='sensors/b', payload=b"2"))
+    router.drain()
+
+    assert sorted(received) == [b"2", b"not a number"]
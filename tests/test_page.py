@@ -0,0 +1,72 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from pygame import Color
+from pygame.time import Clock
+
+from rendash.main import RenderState, render_frame
+from rendash.plugins.basics import TextDisplay
+from rendash.plugins.page import Paginator
+
+
+@pytest.fixture
+def screen():
+    pygame.init()
+    yield pygame.display.set_mode((320, 240))
+    pygame.quit()
+
+
+def cached_paginator():
+    font = pygame.font.Font(None, 16)
+    pages = [TextDisplay(text, font, Color(0, 0, 0), Color(255, 255, 255)) for text in ("one", "two")]
+    paginator = Paginator(pages, show_pagination=False, page_cache=10 * 1024 * 1024, prerender=False)
+
+    # count how many times the first page draws itself
+    renders = []
+    render = pages[0].render
+    pages[0].render = lambda surface, clock: (renders.append(1), render(surface, clock))
+
+    return (paginator, pages, renders)
+
+
+def test_resume_unchanged_cached_page(screen):
+    (paginator, pages, renders) = cached_paginator()
+    (state, clock) = (RenderState(paginator), Clock())
+
+    paginator.start()
+    render_frame(screen, clock, state)
+    paginator.page_next()
+    render_frame(screen, clock, state)
+    assert pages[0].paused
+
+    drawn = len(renders)
+    paginator.page_next()
+    assert not pages[0].paused
+    assert not pages[0].dirty
+
+    render_frame(screen, clock, state)
+    assert len(renders) == drawn
+
+    paginator.stop()
+
+
+def test_resume_page_changed_while_paused(screen):
+    (paginator, pages, renders) = cached_paginator()
+    (state, clock) = (RenderState(paginator), Clock())
+
+    paginator.start()
+    render_frame(screen, clock, state)
+    paginator.page_next()
+    render_frame(screen, clock, state)
+
+    drawn = len(renders)
+    pages[0].text = "changed"
+    paginator.page_next()
+    render_frame(screen, clock, state)
+    assert len(renders) == drawn + 1
+
+    paginator.stop()
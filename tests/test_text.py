@@ -0,0 +1,31 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from rendash.utils.text import wrap_text
+
+
+TEXT = (
+    "AVAST! To Wally, Yvette and LTA: Tokyo's VAT was 7.5%, "
+    "W.A.V.Y. flights to Taiwan via Vancouver were delayed "
+    "(again) by \"WiFi\" faults, and supercalifragilisticexpialidocious "
+    "ffi/ffl ligatures ill-fit a ~12px column."
+)
+
+
+@pytest.fixture
+def font():
+    pygame.font.init()
+    return pygame.font.Font(None, 24)
+
+
+@pytest.mark.parametrize('width', [40, 75, 120, 201, 333, 480])
+def test_wrap_text_lines_fit(font, width):
+    lines = wrap_text(TEXT, font, width)
+
+    assert "".join(lines) == TEXT
+    for line in lines:
+        assert font.size(line.rstrip())[0] < width, line